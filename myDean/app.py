@@ -2,180 +2,140 @@ import warnings
 # Suppress the Pydantic warning message
 warnings.filterwarnings('ignore', message='.*pydantic\.error_wrappers.*')
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
-from myDean import agent
-from langchain.schema import HumanMessage
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, session, stream_with_context
+from langchain_core.messages import HumanMessage
 import os
-from tools.transcript_executer import process_transcript
-from tools.course_conversion_tool import normalize_course_numbers
+import importlib
+import threading
+from tools.course_conversion_tool import convert_course_numbers
+from tools.warmup import LazyResource, readiness, warm_up
 from datetime import datetime, timedelta
 import json
-import hashlib
 import secrets
-import re
-from typing import Dict, List, Set
-from tools.calendar_tool import remove_course_from_schedule
+import uuid
+from typing import Dict, Iterator
+from tools.calendar_tool import load_calendar_profile, remove_course_from_schedule, without_occupancy
+from tools.profile_tool import load_profile, save_profile
+from auth import authenticate, create_account
+from tools.degree_requirements import calculate_progress
+from tools.degree_audit import audit, format_rows, load_profiles
+from tools.requirements_tool import what_if
+from tools.graduation_planner import MAX_COURSES_PER_SEMESTER, plan_for_profile
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)  # Generate a random secret key for sessions
 app.permanent_session_lifetime = timedelta(hours=24)  # Session expires after 24 hours
 
-def load_users():
-    try:
-        with open('data/users.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"users": {}}
-
-def save_users(users_data):
-    with open('data/users.json', 'w') as f:
-        json.dump(users_data, f, indent=4)
-
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def save_profile(username, profile_data):
-    profile_path = f'data/profiles/{username}.json'
-    os.makedirs(os.path.dirname(profile_path), exist_ok=True)
-    with open(profile_path, 'w') as f:
-        json.dump(profile_data, f, indent=4)
-
-def load_degree_requirements():
-    with open('data/degree_requirements.json', 'r') as f:
-        return json.load(f)
-
-def check_course_matches_pattern(course: str, patterns: List[str]) -> bool:
-    return any(re.match(pattern, course) for pattern in patterns)
-
-def normalize_course_format(course: str) -> str:
-    """Normalize course format to use hyphens (e.g., 'COSC 2010' -> 'COSC-2010')"""
-    return course.replace(' ', '-')
-
-def calculate_progress(profile: Dict, requirements: Dict) -> Dict:
-    completed_courses = set(profile.get('courses_completed', []))
-    majors = profile.get('majors', [])
-    minors = profile.get('minors', [])
-    
-    major_name = majors[0] if majors else None
-    minor_name = minors[0] if minors else None
-    
-    result = {
-        'major': {'name': major_name, 'requirements': [], 'progress': 0},
-        'minor': {'name': minor_name, 'requirements': [], 'progress': 0}
+# Usernames allowed to use the /admin endpoints (comma-separated)
+ADMIN_USERS = {u.strip() for u in os.getenv('ADMIN_USERS', '').split(',') if u.strip()}
+
+# Worker processes for /admin/degree-audit (1 audits in the request thread)
+AUDIT_WORKERS = int(os.getenv('AUDIT_WORKERS', '1'))
+
+# The agent and transcript pipeline are loaded lazily so login/static pages are served right away
+dean = LazyResource("agent", lambda: importlib.import_module("myDean"))
+transcript_reader = LazyResource(
+    "transcript_reader",
+    lambda: importlib.import_module("tools.transcript_executer").process_transcript
+)
+
+def warm_up_backends():
+    """Load the agent, then build the tool indexes it registered concurrently."""
+    warm_up()  # agent and transcript pipeline
+    warm_up()  # indexes registered while importing the agent's tools
+
+def process_transcript(file_path: str) -> Dict:
+    return transcript_reader.get()(file_path)
+
+def new_thread_id() -> str:
+    """Create a collision-free conversation thread ID."""
+    return f"thread_{uuid.uuid4().hex}"
+
+def iter_agent_events(message: str, config: Dict) -> Iterator[Dict]:
+    """Run the agent on a message and yield UI events as they happen.
+    
+    Uses LangGraph's "messages" stream mode for LLM tokens and "updates" mode for
+    tool results. Event types are "token", "tool_start", "tool_end" and a final "done".
+    """
+    steps = []
+    final_message = None
+    
+    stream = dean.get().agent.stream(
+        {"messages": [HumanMessage(content=message)]},
+        config=config,
+        stream_mode=["messages", "updates"]
+    )
+    for mode, chunk in stream:
+        if mode == "messages":
+            message_chunk, metadata = chunk
+            # Only surface output of the model node (not tool-internal LLM calls)
+            if metadata.get('langgraph_node') != 'agent':
+                continue
+            for tool_chunk in getattr(message_chunk, 'tool_call_chunks', None) or []:
+                if tool_chunk.get('name'):
+                    yield {'type': 'tool_start', 'tool': tool_chunk['name']}
+            if isinstance(message_chunk.content, str) and message_chunk.content:
+                yield {'type': 'token', 'content': message_chunk.content}
+        elif mode == "updates":
+            if 'agent' in chunk:
+                final_message = chunk['agent']['messages'][-1].content
+            elif 'tools' in chunk:
+                for tool_message in chunk['tools']['messages']:
+                    step = {
+                        'tool': tool_message.name,
+                        'status': getattr(tool_message, 'status', 'success')
+                    }
+                    steps.append(step)
+                    yield {'type': 'tool_end', **step}
+    
+    yield {
+        'type': 'done',
+        'response': final_message,
+        'steps': steps,
+        'context_tokens': dean.get().context_budget.get_stats(config['configurable']['thread_id'])
     }
+
+def run_agent(message: str, config: Dict) -> Dict:
+    """Run the agent to completion and return the final response and tool steps."""
+    for event in iter_agent_events(message, config):
+        if event['type'] == 'done':
+            return event
+    return {'type': 'done', 'response': None, 'steps': [], 'context_tokens': None}
+
+def wants_event_stream() -> bool:
+    """Whether the client asked for a Server-Sent Events response."""
+    return 'text/event-stream' in request.headers.get('Accept', '') or request.args.get('stream') == '1'
+
+def format_sse(event: Dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+def stream_agent_response(message: str, config: Dict, fallback: str = None, **extra) -> Response:
+    """Stream agent events to the client as Server-Sent Events.
     
-    if major_name:
-        major_reqs = requirements['majors'].get(major_name, {})
-        result['major'] = calculate_program_progress(completed_courses, major_reqs, 'major')
-        result['major']['name'] = major_name  # Ensure name is preserved
-        
-    if minor_name:
-        minor_reqs = requirements['minors'].get(minor_name, {})
-        result['minor'] = calculate_program_progress(completed_courses, minor_reqs, 'minor')
-        result['minor']['name'] = minor_name  # Ensure name is preserved
-    
-    # Calculate overall progress only from programs that exist
-    major_reqs = len(result['major']['requirements']) if major_name else 0
-    minor_reqs = len(result['minor']['requirements']) if minor_name else 0
-    total_reqs = major_reqs + minor_reqs
-    
-    if total_reqs > 0:
-        major_completed = sum(1 for req in result['major']['requirements'] if req['completed']) if major_name else 0
-        minor_completed = sum(1 for req in result['minor']['requirements'] if req['completed']) if minor_name else 0
-        result['overall_progress'] = ((major_completed + minor_completed) / total_reqs) * 100
-    else:
-        result['overall_progress'] = 0
-    
-    return result
-
-def calculate_program_progress(completed_courses: Set[str], program_reqs: Dict, program_type: str) -> Dict:
-    # Normalize all completed courses to use hyphens
-    completed_courses = {normalize_course_format(course) for course in completed_courses}
-    
-    requirements = []
-    completed_count = 0
-    total_count = 0
-    
-    # Required courses
-    if 'required_courses' in program_reqs:
-        for course, desc in program_reqs['required_courses'].items():
-            completed = course in completed_courses
-            requirements.append({
-                'title': desc,
-                'details': course,
-                'completed': completed
-            })
-            if completed:
-                completed_count += 1
-            total_count += 1
-    
-    # Math requirements
-    if 'math_requirements' in program_reqs:
-        for course, desc in program_reqs['math_requirements'].items():
-            if 'ELECTIVE' in course:
-                # Check if any valid math elective is completed
-                valid_math_courses = {normalize_course_format(c) for c in load_degree_requirements()['valid_math_electives'].keys()}
-                completed = any(c in completed_courses for c in valid_math_courses)
-                details = "Any math elective from approved list"
-            else:
-                completed = course in completed_courses
-                details = course
-            
-            requirements.append({
-                'title': desc,
-                'details': details,
-                'completed': completed
-            })
-            if completed:
-                completed_count += 1
-            total_count += 1
-    
-    # Electives
-    if 'electives' in program_reqs:
-        elective_req = program_reqs['electives']
-        # Get set of required courses to exclude from electives
-        required_courses = set()
-        if 'required_courses' in program_reqs:
-            required_courses.update(program_reqs['required_courses'].keys())
-        if 'math_requirements' in program_reqs:
-            required_courses.update(course for course in program_reqs['math_requirements'].keys() if 'ELECTIVE' not in course)
-        
-        # Filter completed courses to only include those that:
-        # 1. Match the elective pattern
-        # 2. Are not in the required courses list
-        completed_electives = [c for c in completed_courses 
-                             if check_course_matches_pattern(c, elective_req['valid_patterns']) and
-                             normalize_course_format(c) not in required_courses]
-        
-        requirements.append({
-            'title': f"Program Electives",
-            'details': f"{len(completed_electives)}/{elective_req['required_count']} {elective_req['description']}",
-            'completed': len(completed_electives) >= elective_req['required_count']
-        })
-        if len(completed_electives) >= elective_req['required_count']:
-            completed_count += 1
-        total_count += 1
-    
-    # Additional requirements (for CSES and TES concentration)
-    if 'additional_requirements' in program_reqs:
-        for req_name, req_details in program_reqs['additional_requirements'].items():
-            completed_req = sum(1 for c in completed_courses 
-                              if check_course_matches_pattern(c, req_details['valid_patterns']))
-            
-            requirements.append({
-                'title': req_name.replace('_', ' ').title(),
-                'details': f"{completed_req}/{req_details['required_count']} {req_details['description']}",
-                'completed': completed_req >= req_details['required_count']
-            })
-            if completed_req >= req_details['required_count']:
-                completed_count += 1
-            total_count += 1
-    
-    return {
-        'name': program_reqs.get('name', ''),
-        'requirements': requirements,
-        'progress': (completed_count / total_count * 100) if total_count > 0 else 0
-    }
+    The request context is kept alive while streaming since tools read the Flask session.
+    """
+    def generate():
+        try:
+            for event in iter_agent_events(message, config):
+                if event['type'] == 'done':
+                    event['response'] = event['response'] or fallback
+                    event.update(extra)
+                yield format_sse(event)
+        except Exception as e:
+            yield format_sse({'type': 'error', 'response': f'Error: {str(e)}'})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def reply(body: Dict, status: int = 200) -> Response:
+    """A JSON reply, or a single "done" ("error" for error statuses) event for Server-Sent Events clients."""
+    if wants_event_stream():
+        event = {'type': 'done' if status < 400 else 'error', **body}
+        return Response(format_sse(event), status=status, mimetype='text/event-stream')
+    return jsonify(body), status
 
 @app.route('/')
 def home():
@@ -192,10 +152,7 @@ def login():
     username = data.get('username')
     password = data.get('password')
     
-    users_data = load_users()
-    user = users_data['users'].get(username)
-    
-    if user and user['password'] == hash_password(password):
+    if authenticate(username, password):
         session['username'] = username
         return jsonify({'message': 'Login successful'})
     
@@ -210,17 +167,12 @@ def onboard():
     username = request.form.get('username')
     password = request.form.get('password')
     
-    # Check if username already exists
-    users_data = load_users()
-    if username in users_data['users']:
+    # Create user account (fails if the username already exists)
+    if not username or not password:
+        return jsonify({'message': 'Username and password are required'}), 400
+    if not create_account(username, password):
         return jsonify({'message': 'Username already exists'}), 400
     
-    # Create user account
-    users_data['users'][username] = {
-        'password': hash_password(password)
-    }
-    save_users(users_data)
-    
     # Create user profile
     profile_data = {
         'name': request.form.get('name'),
@@ -230,6 +182,7 @@ def onboard():
         'minors': [request.form.get('minors')] if request.form.get('minors') else [],
         'courses_completed': []
     }
+    unrecognized_courses = []
     
     # Handle transcript upload
     if 'transcript' in request.files:
@@ -246,23 +199,39 @@ def onboard():
             
             if result['success']:
                 # Normalize the courses using course_conversion_tool
-                normalized_courses = normalize_course_numbers(result['formatted_courses'])
-                profile_data['courses_completed'] = normalized_courses
+                converted = convert_course_numbers(result['formatted_courses'])
+                profile_data['courses_completed'] = converted['courses']
+                unrecognized_courses += result.get('unrecognized_courses', []) + converted['unrecognized']
     
     # Add manually entered courses if any
     manual_courses = request.form.get('courses')
     if manual_courses:
-        courses = [c.strip() for c in manual_courses.split(',')]
+        courses = [c.strip() for c in manual_courses.split(',') if c.strip()]
         # Normalize manually entered courses as well
-        normalized_manual_courses = normalize_course_numbers(courses)
-        profile_data['courses_completed'].extend(normalized_manual_courses)
+        converted = convert_course_numbers(courses)
+        profile_data['courses_completed'].extend(converted['courses'])
+        unrecognized_courses += converted['unrecognized']
     
     # Save profile
     save_profile(username, profile_data)
     
     # Log user in
     session['username'] = username
-    return jsonify({'message': 'Account created successfully'})
+    response = {'message': 'Account created successfully'}
+    if unrecognized_courses:
+        # Not added to the profile: not course numbers, or old numbers without a known conversion.
+        # The first chat asks the user about them (see start_chat)
+        response['unrecognized_courses'] = unrecognized_courses
+        session['unrecognized_courses'] = unrecognized_courses
+    return jsonify(response)
+
+@app.route('/healthz')
+def healthz():
+    """Readiness probe: reports which backends and indexes are warm (and cache hit rates)."""
+    resources = readiness()
+    ready = all(r['status'] == 'ready' for r in resources.values())
+    caches = {'sql_query': dean.get().db.cache_stats()} if dean.ready else {}
+    return jsonify({'ready': ready, 'resources': resources, 'caches': caches}), 200 if ready else 503
 
 @app.route('/logout')
 def logout():
@@ -271,7 +240,7 @@ def logout():
 
 @app.before_request
 def before_request():
-    if 'username' not in session and request.endpoint not in ['login', 'onboard', 'static']:
+    if 'username' not in session and request.endpoint not in ['login', 'onboard', 'static', 'healthz']:
         return redirect(url_for('login'))
     session.permanent = True  # Enable session expiration
 
@@ -287,7 +256,7 @@ def chat():
     try:
         thread_id = session.get('thread_id')
         if not thread_id:
-            thread_id = f"thread_{int(datetime.now().timestamp())}"
+            thread_id = new_thread_id()
             session['thread_id'] = thread_id
             print(f"Created new thread_id: {thread_id}")
         else:
@@ -299,24 +268,14 @@ def chat():
                 "user_id": session['username']
             }
         }
-        stream = agent.stream(
-            {"messages": [HumanMessage(content=message)]}, 
-            config=config
-        )
-        
-        # Collect all steps and the final response
-        steps = []
-        final_message = None
+        if wants_event_stream():
+            return stream_agent_response(message, config, thread_id=thread_id)
         
-        for step in stream:
-            if 'agent' in step:
-                final_message = step['agent']['messages'][0].content
-            elif 'thought' in step:
-                steps.append(step['thought'])
-            
+        result = run_agent(message, config)
         return jsonify({
-            'steps': steps,
-            'response': final_message,
+            'steps': result['steps'],
+            'response': result['response'],
+            'context_tokens': result.get('context_tokens'),
             'thread_id': thread_id
         })
         
@@ -326,14 +285,14 @@ def chat():
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'username' not in session:
-        return jsonify({'response': 'Please log in'}), 401
+        return reply({'response': 'Please log in'}, 401)
     
     if 'file' not in request.files:
-        return jsonify({'response': 'No file uploaded'}), 400
+        return reply({'response': 'No file uploaded'}, 400)
     
     file = request.files['file']
     if file.filename == '':
-        return jsonify({'response': 'No file selected'}), 400
+        return reply({'response': 'No file selected'}, 400)
     
     if file and allowed_file(file.filename):
         try:
@@ -353,41 +312,35 @@ def upload_file():
                 courses_message = "I've analyzed the transcript and found these courses: " + \
                     ", ".join(result["formatted_courses"]) + \
                     ". Please keep these in mind for future course recommendations."
+                if result.get("unrecognized_courses"):
+                    courses_message += " These course numbers couldn't be converted, please ask me which courses they are: " + \
+                        ", ".join(result["unrecognized_courses"]) + "."
                 
                 # Send the courses to the agent like a chat message
-                thread_id = session.get('thread_id', f"thread_{int(datetime.now().timestamp())}")
+                thread_id = session.get('thread_id') or new_thread_id()
                 config = {
                     "configurable": {
                         "thread_id": thread_id,
                         "user_id": session['username']
                     }
                 }
-                stream = agent.stream(
-                    {"messages": [HumanMessage(content=courses_message)]},
-                    config=config
-                )
-                
-                # Process the agent's response
-                steps = []
-                final_message = None
-                for step in stream:
-                    if 'agent' in step:
-                        final_message = step['agent']['messages'][0].content
-                    elif 'thought' in step:
-                        steps.append(step['thought'])
+                fallback = "I've recorded your course history and will use it for recommendations."
+                if wants_event_stream():
+                    return stream_agent_response(courses_message, config, fallback=fallback, thread_id=thread_id)
                 
+                result = run_agent(courses_message, config)
                 return jsonify({
-                    'steps': steps,
-                    'response': final_message or "I've recorded your course history and will use it for recommendations.",
+                    'steps': result['steps'],
+                    'response': result['response'] or fallback,
                     'thread_id': thread_id
                 })
             else:
-                return jsonify({'response': f"Sorry, I couldn't process your transcript. {result['message']}"})
+                return reply({'response': f"Sorry, I couldn't process your transcript. {result['message']}"})
             
         except Exception as e:
-            return jsonify({'response': f'Error processing file: {str(e)}'}), 500
+            return reply({'response': f'Error processing file: {str(e)}'}, 500)
     
-    return jsonify({'response': 'Invalid file type. Please upload a PDF or image file.'}), 400
+    return reply({'response': 'Invalid file type. Please upload a PDF or image file.'}, 400)
 
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'pdf'}
@@ -401,9 +354,7 @@ def start_chat():
     
     try:
         # Get user profile
-        profile_path = f'data/profiles/{session["username"]}.json'
-        with open(profile_path, 'r') as f:
-            profile = json.load(f)
+        profile = load_profile(session["username"])
         
         # Create context message for the agent
         context_message = f"START_CHAT: The user is {profile['name']}, a {profile['grade']} at {profile['school']} "
@@ -412,9 +363,13 @@ def start_chat():
             context_message += f" with a minor in {profile['minors'][0]}"
         context_message += ". They have completed certain courses that are noted in their profile. "
         context_message += "Please greet them, welcome them to signing up for the platform, and offer to help with course planning, degree requirements, and other academic questions."
+        unrecognized_courses = session.pop('unrecognized_courses', None)
+        if unrecognized_courses:
+            context_message += " These course numbers they entered couldn't be converted and weren't added to their profile, " + \
+                f"ask them which courses they meant: {', '.join(unrecognized_courses)}."
         
         # Create a new thread for the conversation
-        thread_id = f"thread_{int(datetime.now().timestamp())}"
+        thread_id = new_thread_id()
         session['thread_id'] = thread_id
         
         # Get response from agent using stream to match chat endpoint behavior
@@ -424,27 +379,22 @@ def start_chat():
                 "user_id": session['username']
             }
         }
-        stream = agent.stream(
-            {"messages": [HumanMessage(content=context_message)]},
-            config=config
-        )
-        
-        # Process the agent's response
-        steps = []
-        final_message = None
-        for step in stream:
-            if 'agent' in step:
-                final_message = step['agent']['messages'][0].content
-            elif 'thought' in step:
-                steps.append(step['thought'])
+        fallback = "Hello! I'm here to help you with your course planning and academic questions. What can I assist you with today?"
+        if wants_event_stream():
+            return stream_agent_response(
+                context_message, config, fallback=fallback,
+                thread_id=thread_id, message='Chat started successfully'
+            )
         
+        result = run_agent(context_message, config)
+        final_message = result['response']
         if not final_message:
             print("No response from agent, using fallback")
-            final_message = "Hello! I'm here to help you with your course planning and academic questions. What can I assist you with today?"
+            final_message = fallback
         
         # Return the agent's response
         return jsonify({
-            'steps': steps,
+            'steps': result['steps'],
             'response': final_message,
             'thread_id': thread_id,
             'message': 'Chat started successfully'
@@ -463,33 +413,74 @@ def get_degree_progress():
     
     try:
         # Load user profile
-        profile_path = f'data/profiles/{session["username"]}.json'
-        with open(profile_path, 'r') as f:
-            profile = json.load(f)
-        
-        # Load degree requirements
-        requirements = load_degree_requirements()
+        profile = load_profile(session["username"])
         
-        # Calculate progress
-        progress = calculate_progress(profile, requirements)
+        # Calculate progress (requirements are compiled once, see tools/degree_requirements.py)
+        progress = calculate_progress(profile)
         
         return jsonify(progress)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/what-if', methods=['POST'])
+def what_if_preview():
+    """Progress change of hypothetical course lists ({"scenarios": [[...], ...], "program": optional})."""
+    if 'username' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    data = request.get_json() or {}
+    scenarios = data.get('scenarios')
+    if not isinstance(scenarios, list) or not all(
+        isinstance(s, list) and all(isinstance(c, str) for c in s) for s in scenarios
+    ):
+        return jsonify({'error': 'scenarios must be a list of lists of course numbers (strings)'}), 400
+    program = data.get('program')
+    if program is not None and not isinstance(program, str):
+        return jsonify({'error': 'program must be a string'}), 400
+    
+    result = what_if(load_profile(session['username']), scenarios, program)
+    return jsonify(result), 400 if 'error' in result else 200
+
+@app.route('/api/graduation-plan')
+def graduation_plan():
+    """Semester-by-semester plan for the remaining requirements (?max_per_semester=4&program=optional)."""
+    if 'username' not in session:
+        return jsonify({'error': 'Not logged in'}), 401
+    
+    max_per_semester = request.args.get('max_per_semester', MAX_COURSES_PER_SEMESTER, type=int)
+    result = plan_for_profile(load_profile(session['username']), max_per_semester, request.args.get('program'))
+    return jsonify(result), 400 if 'error' in result else 200
+
+@app.route('/admin/degree-audit')
+def degree_audit():
+    """Degree progress of every student as CSV (default) or JSON Lines (?format=jsonl), streamed.
+    
+    ?all_programs=1 audits every program instead of only the declared majors/minors.
+    """
+    if session.get('username') not in ADMIN_USERS:
+        return jsonify({'error': 'Not authorized'}), 403
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'error': 'format must be csv or jsonl'}), 400
+    all_programs = request.args.get('all_programs') in ('1', 'true')
+    
+    rows = audit(load_profiles(), all_programs=all_programs, workers=AUDIT_WORKERS)
+    return Response(
+        format_rows(rows, fmt),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=degree_audit.{fmt}'}
+    )
+
 @app.route('/get_schedule')
 def get_schedule():
     if 'username' not in session:
         return jsonify({'error': 'Not logged in'}), 401
     
     try:
-        calendar_profile_path = f'data/calendar_profiles/{session["username"]}.json'
-        if os.path.exists(calendar_profile_path):
-            with open(calendar_profile_path, 'r') as f:
-                calendar_data = json.load(f)
-                return jsonify(calendar_data)
-        else:
-            return jsonify({'courses': []})
+        calendar_profile = load_calendar_profile(session["username"])
+        calendar_profile['courses'] = without_occupancy(calendar_profile['courses'])
+        return jsonify(calendar_profile)
     except Exception as e:
         print(f"Error loading schedule: {str(e)}")
         return jsonify({'error': 'Failed to load schedule'}), 500
@@ -512,6 +503,9 @@ def remove_course_direct():
         print(f"Error removing course: {str(e)}")
         return jsonify({'error': 'Failed to remove course'}), 500
 
+# Load the agent and its indexes in the background
+threading.Thread(target=warm_up_backends, name="warmup", daemon=True).start()
+
 if __name__ == '__main__':
     print(f"Server started")
     app.run(debug=True) 
\ No newline at end of file
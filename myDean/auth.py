@@ -0,0 +1,111 @@
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Optional
+from tools.user_store import UserStore, user_store
+from tools.warmup import LazyResource
+
+# PBKDF2-SHA256 work factor for new password hashes; raising it upgrades existing hashes on their next login
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+PASSWORD_HASH_SCHEME = "pbkdf2_sha256"
+
+# Successful verifications remembered so repeat logins skip the slow hash (0 disables)
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+
+# Hashes from before the slow scheme: unsalted hex SHA-256
+LEGACY_HASH = re.compile(r"[0-9a-f]{64}")
+
+def hash_password(password: str, iterations: int = None) -> str:
+    """Salted PBKDF2 hash, stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>"."""
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations).hex()
+    return f"{PASSWORD_HASH_SCHEME}${iterations}${salt}${digest}"
+
+def check_password(password: str, password_hash: str) -> bool:
+    """Verify a password against a PBKDF2 or legacy SHA-256 hash (in constant time)."""
+    if LEGACY_HASH.fullmatch(password_hash):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), password_hash)
+    try:
+        scheme, iterations, salt, digest = password_hash.split("$")
+    except ValueError:
+        return False
+    if scheme != PASSWORD_HASH_SCHEME:
+        return False
+    computed = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), int(iterations)).hex()
+    return hmac.compare_digest(computed, digest)
+
+def needs_rehash(password_hash: str) -> bool:
+    return not password_hash.startswith(f"{PASSWORD_HASH_SCHEME}${PASSWORD_HASH_ITERATIONS}$")
+
+class VerificationCache:
+    """Bounded LRU set of (stored hash, password) pairs that verified.
+
+    Entries are keyed by an HMAC with a per-process random key, so the cache never holds
+    passwords or anything that could be checked offline. A password change replaces the
+    stored hash, so stale entries simply stop matching. Failed attempts are never cached.
+    """
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[bytes, None]" = OrderedDict()
+        self._key = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+
+    def _entry(self, password: str, password_hash: str) -> bytes:
+        return hmac.new(self._key, f"{password_hash}\0{password}".encode(), hashlib.sha256).digest()
+
+    def __contains__(self, item) -> bool:
+        entry = self._entry(*item)
+        with self._lock:
+            if entry in self.entries:
+                self.entries.move_to_end(entry)
+                return True
+        return False
+
+    def add(self, password: str, password_hash: str):
+        if self.maxsize <= 0:
+            return
+        entry = self._entry(password, password_hash)
+        with self._lock:
+            self.entries[entry] = None
+            self.entries.move_to_end(entry)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+verified = VerificationCache()
+
+# Checked for unknown usernames (built by the warm-up, hashing is too slow for import time)
+_dummy_hash = LazyResource("dummy_password_hash", lambda: hash_password(secrets.token_hex(8)))
+
+def authenticate(username: str, password: str, store: Optional[UserStore] = None) -> bool:
+    """Check a username and password.
+
+    Legacy hashes (and hashes made with a different work factor) are replaced with a
+    current one after a successful check.
+    """
+    store = store or user_store()
+    account = store.get_account(username) if username and password else None
+    if not account:
+        # Spend the same time as a real check, so response times don't reveal which usernames exist
+        check_password(password or "", _dummy_hash.get())
+        return False
+
+    password_hash = account["password_hash"]
+    if (password, password_hash) in verified:
+        return True
+    if not check_password(password, password_hash):
+        return False
+    if needs_rehash(password_hash):
+        password_hash = hash_password(password)
+        store.set_password_hash(username, password_hash)
+    verified.add(password, password_hash)
+    return True
+
+def create_account(username: str, password: str, store: Optional[UserStore] = None) -> bool:
+    """Create an account, False if the username is taken."""
+    return (store or user_store()).create_account(username, hash_password(password))
@@ -0,0 +1,108 @@
+import argparse
+import sqlite3
+import zlib
+from typing import Any, Optional, Tuple
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+CHECKPOINT_DB = "data/checkpoints.db"
+
+# Marks blobs that were zlib-compressed in the "type" column of checkpoints/writes
+COMPRESSED_PREFIX = "zlib:"
+
+class CompressedSerializer(JsonPlusSerializer):
+    """JsonPlus serializer that zlib-compresses large blobs.
+
+    Conversation histories (SQL results, course descriptions) are highly repetitive
+    text, so compressing them keeps the checkpoint database small.
+    """
+
+    def __init__(self, level: int = 6, min_size: int = 512):
+        super().__init__()
+        self.level = level
+        self.min_size = min_size
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = super().dumps_typed(obj)
+        if len(data) >= self.min_size:
+            return COMPRESSED_PREFIX + type_, zlib.compress(data, self.level)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, blob = data
+        if type_.startswith(COMPRESSED_PREFIX):
+            return super().loads_typed((type_[len(COMPRESSED_PREFIX):], zlib.decompress(blob)))
+        return super().loads_typed(data)
+
+class SqliteCheckpointer(SqliteSaver):
+    """File-backed checkpointer shared by all workers (SQLite in WAL mode)."""
+
+    def __init__(self, path: str = CHECKPOINT_DB):
+        # check_same_thread=False is safe: SqliteSaver serializes access with a lock
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        super().__init__(conn, serde=CompressedSerializer())
+
+    def compact(self, keep: int = 1, thread_id: Optional[str] = None) -> int:
+        """Prune superseded checkpoints, keeping the newest `keep` per thread.
+
+        Every checkpoint stores the full conversation state, so only the latest one
+        is needed to resume a thread. Pending writes of pruned checkpoints are removed too.
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        thread_filter = "WHERE thread_id = ?" if thread_id else ""
+        params = (thread_id, keep) if thread_id else (keep,)
+
+        with self.cursor() as cur:
+            # checkpoint_id is a time-ordered UUID, so it sorts newest-last
+            cur.execute(
+                f"""
+                DELETE FROM checkpoints WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (
+                            PARTITION BY thread_id, checkpoint_ns
+                            ORDER BY checkpoint_id DESC
+                        ) AS rn
+                        FROM checkpoints {thread_filter}
+                    ) WHERE rn > ?
+                )
+                """,
+                params,
+            )
+            deleted = cur.rowcount
+            cur.execute(
+                """
+                DELETE FROM writes WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = writes.thread_id
+                      AND c.checkpoint_ns = writes.checkpoint_ns
+                      AND c.checkpoint_id = writes.checkpoint_id
+                )
+                """
+            )
+        return deleted
+
+    def vacuum(self) -> None:
+        """Return space freed by compaction to the filesystem."""
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("VACUUM")
+
+if __name__ == "__main__":
+    # Compaction job, e.g. run from cron: python checkpointer.py --keep 1 --vacuum
+    parser = argparse.ArgumentParser(description="Prune superseded conversation checkpoints.")
+    parser.add_argument("--db", default=CHECKPOINT_DB)
+    parser.add_argument("--keep", type=int, default=1, help="Checkpoints to keep per thread")
+    parser.add_argument("--thread-id", help="Only compact this thread")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards")
+    args = parser.parse_args()
+
+    checkpointer = SqliteCheckpointer(args.db)
+    deleted = checkpointer.compact(keep=args.keep, thread_id=args.thread_id)
+    print(f"Deleted {deleted} superseded checkpoints.")
+    if args.vacuum:
+        checkpointer.vacuum()
+        print("Database vacuumed.")
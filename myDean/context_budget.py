@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
+import tiktoken
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+# Token budget for the conversation history sent to the model (the system prompt is added on top)
+MAX_CONTEXT_TOKENS = int(os.getenv("MAX_CONTEXT_TOKENS", "12000"))
+
+# Tool outputs from earlier turns (e.g. full course descriptions) are cut down to this many tokens
+STALE_TOOL_OUTPUT_TOKENS = int(os.getenv("STALE_TOOL_OUTPUT_TOKENS", "200"))
+
+# Tool outputs from the current turn are cut down to this many tokens (one huge output can't blow the budget)
+CURRENT_TOOL_OUTPUT_TOKENS = int(os.getenv("CURRENT_TOOL_OUTPUT_TOKENS", "4000"))
+
+# Threads whose latest token stats are kept per process (least recently used are dropped)
+STATS_THREADS = int(os.getenv("CONTEXT_STATS_THREADS", "1024"))
+
+# Header of the rolling summary message that replaces folded turns
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+FACTS_HEADER = "Latest student facts:"
+
+# Tools whose most recent output describes the student and must never be dropped
+PINNED_TOOLS = {"get_profile"}
+
+# Prefix of the message /upload sends with the courses read from a transcript
+TRANSCRIPT_PREFIX = "I've analyzed the transcript"
+
+SUMMARY_PROMPT = """Summarize the conversation below between a Georgetown student and their academic advisor agent.
+Keep every concrete fact: course numbers and titles, CRNs, instructors, prerequisites discussed,
+the student's plans and preferences, and any open questions. Be concise and use bullet points.
+
+{conversation}"""
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def _content_text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return json.dumps(message.content)
+
+class ContextBudget:
+    """Pre-model hook that keeps the agent's prompt within a token budget.
+
+    1. Tool outputs from earlier turns are truncated (the model already answered from them),
+       and oversized tool outputs from the current turn are capped.
+    2. If the history is still over budget, the oldest turns are folded into a rolling
+       summary message, which replaces them in the stored thread.
+    The latest profile and transcript facts are carried verbatim into the summary.
+    """
+
+    def __init__(self, summarizer, model: str, max_tokens: int = MAX_CONTEXT_TOKENS,
+                 stale_tool_tokens: int = STALE_TOOL_OUTPUT_TOKENS,
+                 current_tool_tokens: int = CURRENT_TOOL_OUTPUT_TOKENS, stats_threads: int = STATS_THREADS):
+        self.summarizer = summarizer
+        self.encoding = _get_encoding(model)
+        self.max_tokens = max_tokens
+        self.stale_tool_tokens = stale_tool_tokens
+        self.current_tool_tokens = current_tool_tokens
+        self._count_text = lru_cache(maxsize=4096)(lambda text: len(self.encoding.encode(text)))
+        # Tokens before/after trimming for the latest turn of each thread
+        self.stats: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self.stats_threads = stats_threads
+        self._stats_lock = threading.Lock()
+
+    def get_stats(self, thread_id: str) -> Optional[Dict[str, int]]:
+        """Tokens-before/after for the most recent turn of a thread."""
+        with self._stats_lock:
+            stats = self.stats.get(thread_id)
+            return dict(stats) if stats else None
+
+    def count_tokens(self, messages: List[BaseMessage]) -> int:
+        """Approximate prompt tokens of a message list (content, tool calls and per-message overhead)."""
+        total = 0
+        for message in messages:
+            total += 4 + self._count_text(_content_text(message))
+            if isinstance(message, AIMessage) and message.tool_calls:
+                total += self._count_text(json.dumps([call["args"] for call in message.tool_calls]))
+        return total
+
+    def __call__(self, state: Dict, config: RunnableConfig) -> Dict:
+        messages = state["messages"]
+        tokens_before = self.count_tokens(messages)
+
+        turns = self._split_turns(messages)
+        earlier = [m for turn in turns[:-1] for m in turn]
+        trimmed_turns = [[self._shrink_stale(m) for m in turn] for turn in turns[:-1]]
+        trimmed_turns.append([self._shrink_current(m) for m in turns[-1]])
+
+        update = {}
+        if sum(self.count_tokens(turn) for turn in trimmed_turns) > self.max_tokens and len(turns) > 1:
+            # Keep as many recent turns as fit in half the budget (always the current one)
+            keep = 1
+            recent_tokens = self.count_tokens(trimmed_turns[-1])
+            while keep < len(turns) - 1:
+                next_tokens = self.count_tokens(trimmed_turns[-keep - 1])
+                if recent_tokens + next_tokens > self.max_tokens // 2:
+                    break
+                recent_tokens += next_tokens
+                keep += 1
+
+            folded = [m for turn in turns[:-keep] for m in turn]
+            summary_message = self._summarize(folded, earlier)
+            recent = [m for turn in turns[-keep:] for m in turn]
+            # Persist the summary so later turns don't re-send (or re-summarize) folded history
+            update["messages"] = [RemoveMessage(id=REMOVE_ALL_MESSAGES), summary_message, *recent]
+            trimmed_turns = [[summary_message]] + trimmed_turns[-keep:]
+
+        llm_input_messages = [m for turn in trimmed_turns for m in turn]
+        tokens_after = self.count_tokens(llm_input_messages)
+        self._record(config, messages, tokens_before, tokens_after)
+
+        update["llm_input_messages"] = llm_input_messages
+        return update
+
+    def _split_turns(self, messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+        """Group messages into turns that each start at a user message.
+
+        Splitting on user messages keeps every tool call next to its tool result.
+        """
+        turns = [[]]
+        for message in messages:
+            if isinstance(message, HumanMessage) and turns[-1]:
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    def _truncate_tool_output(self, message: BaseMessage, max_tokens: int, note: str) -> BaseMessage:
+        if not isinstance(message, ToolMessage) or message.name in PINNED_TOOLS:
+            return message
+        text = _content_text(message)
+        tokens = self.encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return message
+        truncated = self.encoding.decode(tokens[:max_tokens])
+        return message.model_copy(update={"content": f"{truncated}... [{note}]"})
+
+    def _shrink_stale(self, message: BaseMessage) -> BaseMessage:
+        return self._truncate_tool_output(
+            message, self.stale_tool_tokens, "truncated earlier tool output, re-run the tool if needed"
+        )
+
+    def _shrink_current(self, message: BaseMessage) -> BaseMessage:
+        return self._truncate_tool_output(
+            message, self.current_tool_tokens, "truncated long tool output, narrow the query if more is needed"
+        )
+
+    def _latest_facts(self, messages: List[BaseMessage]) -> List[str]:
+        """Latest profile and transcript facts, taken verbatim from the history."""
+        facts = {}
+        for message in messages:
+            if isinstance(message, ToolMessage) and message.name in PINNED_TOOLS:
+                facts["profile"] = f"Profile: {_content_text(message)}"
+            elif isinstance(message, HumanMessage) and _content_text(message).startswith(TRANSCRIPT_PREFIX):
+                facts["transcript"] = f"Transcript: {_content_text(message)}"
+            elif isinstance(message, SystemMessage) and _content_text(message).startswith(SUMMARY_HEADER):
+                # Facts carried over from an earlier summary (newer messages override them)
+                _, _, previous = _content_text(message).partition(f"\n\n{FACTS_HEADER}\n")
+                for line in filter(None, previous.split("\n")):
+                    facts["transcript" if line.startswith("Transcript:") else "profile"] = line
+        # One fact per line so they can be carried over into the next summary
+        return [fact.replace("\n", " ") for fact in facts.values()]
+
+    def _summarize(self, folded: List[BaseMessage], earlier: List[BaseMessage]) -> SystemMessage:
+        conversation = "\n".join(
+            f"{message.type}: {_content_text(self._shrink_stale(message))}"
+            for message in folded
+            if _content_text(message)
+        )
+        summary = self.summarizer.invoke(SUMMARY_PROMPT.format(conversation=conversation)).content
+        content = f"{SUMMARY_HEADER}\n{summary}"
+        facts = self._latest_facts(earlier)
+        if facts:
+            content += f"\n\n{FACTS_HEADER}\n" + "\n".join(facts)
+        return SystemMessage(content=content)
+
+    def _record(self, config: RunnableConfig, messages: List[BaseMessage], tokens_before: int, tokens_after: int):
+        thread_id = config.get("configurable", {}).get("thread_id")
+        with self._stats_lock:
+            # A new turn starts when the last message is the user's
+            if isinstance(messages[-1], HumanMessage) or thread_id not in self.stats:
+                self.stats[thread_id] = {"model_calls": 0, "tokens_before": 0, "tokens_after": 0}
+            self.stats.move_to_end(thread_id)
+            while len(self.stats) > self.stats_threads:
+                self.stats.popitem(last=False)
+            stats = self.stats[thread_id]
+            stats["model_calls"] += 1
+            stats["tokens_before"] += tokens_before
+            stats["tokens_after"] += tokens_after
+        logger.debug("Context tokens for %s: %d -> %d", thread_id, tokens_before, tokens_after)
@@ -1,16 +1,11 @@
-import json
+import sqlite3
 
 def clear_users():
-    # Reset users.json to empty users dictionary
-    empty_users = {
-        "users": {}
-    }
-    
-    # Write the empty users dictionary to users.json
-    with open('./users.json', 'w') as f:
-        json.dump(empty_users, f, indent=4)
+    # Delete every account from users.db (profiles and calendars are kept)
+    with sqlite3.connect('./users.db') as conn:
+        conn.execute("DELETE FROM account")
 
 if __name__ == "__main__":
-    print("Clearing users.json...")
+    print("Clearing accounts in users.db...")
     clear_users()
-    print("Users cleared successfully. Profiles in data/profiles/ are preserved.") 
\ No newline at end of file
+    print("Users cleared successfully. Profiles and calendars in users.db are preserved.") 
\ No newline at end of file
@@ -0,0 +1,55 @@
+import os
+import threading
+from typing import Callable, Dict, List
+from langchain_community.utilities import SQLDatabase
+from langchain_core.messages import BaseMessage, SystemMessage
+
+# Render the database schema into the system prompt instead of having the agent call sql_db_schema
+# (set SCHEMA_IN_PROMPT=0 to go back to the schema tools)
+SCHEMA_IN_PROMPT = os.getenv("SCHEMA_IN_PROMPT", "1") != "0"
+
+# Toolkit tools that are redundant once the schema is in the prompt
+SCHEMA_TOOLS = {"sql_db_schema", "sql_db_list_tables"}
+
+SCHEMA_TOOL_INSTRUCTIONS = """Before running your query, ALWAYS CHECK THE SCHEMA OF THE DATABASE USING THE "sql_db_schema" TOOL!"""
+
+SCHEMA_PROMPT_INSTRUCTIONS = """The schema of the database (with a few sample rows of each table) is at the end of these instructions, use it to write your queries."""
+
+SCHEMA_SECTION = """
+
+DATABASE SCHEMA:
+{schema}"""
+
+class SchemaPrompt:
+    """State modifier that prepends the system prompt with the database schema rendered in.
+
+    The prompt is rendered once and cached; it is only re-rendered (re-reflecting the
+    database) when the database file changes on disk.
+    """
+
+    def __init__(self, template: str, db_factory: Callable[[], SQLDatabase], db_path: str, **fields: str):
+        self.template = template
+        self.db_factory = db_factory
+        self.db_path = db_path
+        self.fields: Dict[str, str] = fields
+        self.mtime = None
+        self.message = None
+        self._lock = threading.Lock()
+
+    def render(self) -> SystemMessage:
+        mtime = os.stat(self.db_path).st_mtime_ns
+        if mtime != self.mtime:
+            with self._lock:
+                if mtime != self.mtime:
+                    db = self.db_factory()
+                    self.message = SystemMessage(content=self.template.format(
+                        schema_instructions=SCHEMA_PROMPT_INSTRUCTIONS,
+                        table_names=db.get_usable_table_names(),
+                        **self.fields
+                    ) + SCHEMA_SECTION.format(schema=db.get_table_info()))
+                    self.mtime = mtime
+                    print(f"Rendered schema into the system prompt ({len(self.message.content)} chars)")
+        return self.message
+
+    def __call__(self, state: Dict) -> List[BaseMessage]:
+        return [self.render()] + state["messages"]
@@ -0,0 +1,132 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from tools.courses_db import SQL_TOKEN, ReadOnlySQLDatabase
+
+# Bounds of the query result cache (entries and total characters of cached results)
+SQL_CACHE_SIZE = int(os.getenv("SQL_CACHE_SIZE", "256"))
+SQL_CACHE_MAX_CHARS = int(os.getenv("SQL_CACHE_MAX_CHARS", str(2_000_000)))
+
+LITERAL = re.compile(r"'(?:[^']|'')*'|\d+(?:\.\d+)?")
+READ_ONLY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+
+def _sort_in_lists(tokens):
+    """Sort the items of IN lists that only contain literals, e.g. IN (3, 1) -> IN (1, 3)."""
+    result, i = [], 0
+    while i < len(tokens):
+        result.append(tokens[i])
+        if tokens[i] == "in" and tokens[i + 1:i + 2] == ["("] and ")" in tokens[i + 2:]:
+            end = tokens.index(")", i + 2)
+            items, commas = tokens[i + 2:end:2], tokens[i + 3:end:2]
+            if items and all(LITERAL.fullmatch(t) for t in items) and all(c == "," for c in commas):
+                result += ["(", ", ".join(sorted(items)), ")"]
+                i = end + 1
+                continue
+        i += 1
+    return result
+
+def normalize_sql(sql: str) -> str:
+    """Canonical form of a query for use as a cache key.
+
+    Whitespace is collapsed, keywords and unquoted identifiers are lowercased (string literals
+    keep their case), trailing semicolons are dropped and literal IN lists are sorted.
+    """
+    tokens = [
+        token if token[0] in "'\"" else token.lower()
+        for token in SQL_TOKEN.findall(sql.strip().rstrip(";"))
+    ]
+    return " ".join(_sort_in_lists(tokens))
+
+class QueryCache:
+    """LRU cache of query results, bounded by entries and total size, with hit/miss counters."""
+
+    def __init__(self, maxsize: int = SQL_CACHE_SIZE, max_chars: int = SQL_CACHE_MAX_CHARS):
+        self.maxsize = maxsize
+        self.max_chars = max_chars
+        self.entries: "OrderedDict[Tuple, str]" = OrderedDict()
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple, result: str):
+        if len(result) > self.max_chars:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.chars -= len(self.entries.pop(key))
+            self.entries[key] = result
+            self.chars += len(result)
+            while len(self.entries) > self.maxsize or self.chars > self.max_chars:
+                _, evicted = self.entries.popitem(last=False)
+                self.chars -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.chars = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "entries": len(self.entries),
+            "chars": self.chars,
+            "maxsize": self.maxsize,
+            "invalidations": self.invalidations
+        }
+
+class CachedSQLDatabase(ReadOnlySQLDatabase):
+    """SQLDatabase whose read-only query results are cached by normalized SQL.
+
+    Used by the toolkit's sql_db_query tool. The whole cache is dropped when the
+    database file changes on disk.
+    """
+
+    def __init__(self, *args, cache: Optional[QueryCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache or QueryCache()
+        self._mtime = self._file_mtime()
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.db_path).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def run(self, command, fetch: str = "all", include_columns: bool = False, *,
+            parameters: Optional[Dict[str, Any]] = None, execution_options: Optional[Dict[str, Any]] = None):
+        if not isinstance(command, str) or parameters or fetch == "cursor" or not READ_ONLY.match(command):
+            return super().run(command, fetch, include_columns,
+                               parameters=parameters, execution_options=execution_options)
+
+        mtime = self._file_mtime()
+        if mtime != self._mtime:
+            self.cache.clear()
+            self._mtime = mtime
+
+        key = (normalize_sql(command), fetch, include_columns)
+        result = self.cache.get(key)
+        if result is None:
+            result = super().run(command, fetch, include_columns, execution_options=execution_options)
+            self.cache.put(key, result)
+        return result
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
@@ -12,9 +12,28 @@ window.addEventListener('DOMContentLoaded', () => {
     if (welcomeMessage) {
         addMessage(welcomeMessage, false);
         sessionStorage.removeItem('welcomeMessage');  // Clear it after displaying
+    } else if (sessionStorage.getItem('startChat')) {
+        // Stream the greeting from a freshly onboarded user's first chat
+        sessionStorage.removeItem('startChat');
+        startChat();
     }
 });
 
+async function startChat() {
+    const thinkingDiv = addMessage(null, false, true);
+    try {
+        await streamAgentResponse('/start_chat', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            }
+        }, thinkingDiv);
+    } catch (error) {
+        thinkingDiv.remove();
+        addMessage("Hello! I'm here to help you with your course planning and academic questions. What can I assist you with today?", false);
+    }
+}
+
 // Auto-resize textarea
 userInput.addEventListener('input', function() {
     this.style.height = 'auto';
@@ -101,17 +120,13 @@ async function sendMessage() {
     const thinkingDiv = addMessage(null, false, true);
 
     try {
-        const response = await fetch('/chat', {
+        await streamAgentResponse('/chat', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({ message: message })
-        });
-
-        const data = await response.json();
-        thinkingDiv.remove();
-        addMessage(data.response, false);
+        }, thinkingDiv);
         
         // Update both degree progress and schedule after each agent response
         await updateDegreeProgress();
@@ -128,6 +143,114 @@ async function sendMessage() {
     }
 }
 
+// Stream an agent response over Server-Sent Events into the given thinking message,
+// rendering LLM tokens and tool start/finish events as they arrive
+async function streamAgentResponse(url, options, messageDiv) {
+    const response = await fetch(url, {
+        ...options,
+        headers: { ...(options.headers || {}), 'Accept': 'text/event-stream' }
+    });
+
+    const contentDiv = messageDiv.querySelector('.message-content');
+    const toolsList = document.createElement('ul');
+    toolsList.className = 'tool-activity';
+    const textDiv = document.createElement('div');
+    contentDiv.prepend(toolsList);
+    contentDiv.appendChild(textDiv);
+
+    let text = '';
+    let doneEvent = null;
+
+    const removeIndicator = () => {
+        const indicator = contentDiv.querySelector('.thinking-indicator');
+        if (indicator) indicator.remove();
+    };
+
+    // Replies that aren't streamed (e.g. rejected requests) are JSON with the message in "response"
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!contentType.includes('text/event-stream')) {
+        const data = await response.json().catch(() => null);
+        if (!data || !data.response) {
+            throw new Error(`Request failed with status ${response.status}`);
+        }
+        removeIndicator();
+        textDiv.innerHTML = marked.parse(data.response);
+        return response.ok ? { type: 'done', ...data } : null;
+    }
+    if (!response.body) {
+        throw new Error(`Request failed with status ${response.status}`);
+    }
+    const keepScrolled = () => {
+        if (isUserNearBottom) {
+            chatContainer.scrollTop = chatContainer.scrollHeight;
+        }
+    };
+
+    const handleEvent = (event) => {
+        if (event.type === 'token') {
+            removeIndicator();
+            text += event.content;
+            textDiv.innerHTML = marked.parse(text);
+        } else if (event.type === 'tool_start') {
+            const item = document.createElement('li');
+            item.className = 'tool-item running';
+            item.dataset.tool = event.tool;
+            item.textContent = `Running ${event.tool}...`;
+            toolsList.appendChild(item);
+            // Text streamed before a tool call is intermediate reasoning, start fresh after it
+            text = '';
+            textDiv.innerHTML = '';
+        } else if (event.type === 'tool_end') {
+            const item = [...toolsList.querySelectorAll('.tool-item.running')]
+                .find(li => li.dataset.tool === event.tool);
+            if (item) {
+                item.className = `tool-item ${event.status === 'error' ? 'failed' : 'finished'}`;
+                item.textContent = `${event.status === 'error' ? '✗' : '✓'} ${event.tool}`;
+            }
+        } else if (event.type === 'done') {
+            removeIndicator();
+            doneEvent = event;
+            if (event.response) {
+                textDiv.innerHTML = marked.parse(event.response);
+            }
+        } else if (event.type === 'error') {
+            // Show the server's explanation in the message instead of a generic failure
+            if (!event.response) {
+                throw new Error(`Request failed with status ${response.status}`);
+            }
+            removeIndicator();
+            textDiv.innerHTML = marked.parse(event.response);
+        }
+        keepScrolled();
+    };
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE frames are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const data = frame.split('\n')
+                .filter(line => line.startsWith('data:'))
+                .map(line => line.slice(5).trim())
+                .join('\n');
+            if (data) {
+                handleEvent(JSON.parse(data));
+            }
+        }
+    }
+
+    removeIndicator();
+    return doneEvent;
+}
+
 // Check if user is near bottom
 function checkIfNearBottom() {
     const threshold = 100;
@@ -170,14 +293,10 @@ document.getElementById('file-upload').addEventListener('change', async function
     const thinkingDiv = addMessage(null, false, true);
 
     try {
-        const response = await fetch('/upload', {
+        await streamAgentResponse('/upload', {
             method: 'POST',
             body: formData
-        });
-
-        const data = await response.json();
-        thinkingDiv.remove();
-        addMessage(data.response, false);
+        }, thinkingDiv);
     } catch (error) {
         thinkingDiv.remove();
         addMessage('Error: Could not process the file.', false);
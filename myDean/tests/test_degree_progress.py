@@ -0,0 +1,116 @@
+import os
+import re
+import sys
+import pytest
+
+MYDEAN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MYDEAN_DIR)
+
+from tools.degree_audit import audit
+from tools.degree_requirements import (
+    MATH_ELECTIVE, calculate_program_progress, calculate_progress, completed_courses, degree_requirements
+)
+
+BS = "Bachelor of Science in Computer Science (B.S.)"
+AB = "Bachelor of Arts in Computer Science (A.B.)"
+CSES = "Bachelor of Arts in Computer Science, Ethics, and Society (CSES)"
+CS_MINOR = "Minor in Computer Science"
+TES = "Concentration in Technology, Ethics, and Society"
+
+# Profiles on which the compiled engine must agree with the progress page from before it:
+# no duplicated courses, and either no approved math electives or at least one per elective slot
+PROFILES = [
+    {"courses_completed": [], "majors": [BS], "minors": []},
+    {"courses_completed": ["COSC 1020", "COSC 1030", "COSC 2010", "MATH 1350"], "majors": [BS], "minors": [CS_MINOR]},
+    {
+        "courses_completed": ["COSC 1020", "COSC 1030", "COSC 1110", "COSC 2010", "COSC 2020", "COSC 3470",
+                              "COSC 4710", "MATH 1350", "MATH 2010", "MATH 2140", "MATH 2250", "MATH 2540"],
+        "majors": [BS], "minors": []
+    },
+    {"courses_completed": ["COSC-1020", "COSC-2310", "COSC-3720", "MATH-2140", "MATH-2250"], "majors": [AB], "minors": [TES]},
+    {"courses_completed": ["COSC 1030", "COSC 2010", "PHIL 2100", "COSC 3720", "COSC 4710"], "majors": [CSES], "minors": []},
+    {"courses_completed": ["PHIL 2100", "COSC 4710", "GOVT 2000"], "majors": [], "minors": [TES]},
+]
+
+@pytest.fixture(autouse=True)
+def in_mydean_dir(monkeypatch):
+    # Data files are opened relative to the app directory
+    monkeypatch.chdir(MYDEAN_DIR)
+
+def legacy_program_progress(courses, program_reqs, valid_math_electives):
+    """The degree progress panel's calculation before the requirements were compiled (kept as a reference)."""
+    courses = {course.replace(" ", "-") for course in courses}
+    matches = lambda course, patterns: any(re.match(pattern, course) for pattern in patterns)
+    requirements = []
+    for course, desc in program_reqs.get("required_courses", {}).items():
+        requirements.append({"title": desc, "details": course, "completed": course in courses})
+    for course, desc in program_reqs.get("math_requirements", {}).items():
+        if MATH_ELECTIVE in course:
+            completed = any(c.replace(" ", "-") in courses for c in valid_math_electives)
+            details = "Any math elective from approved list"
+        else:
+            completed, details = course in courses, course
+        requirements.append({"title": desc, "details": details, "completed": completed})
+    if "electives" in program_reqs:
+        req = program_reqs["electives"]
+        required = set(program_reqs.get("required_courses", {}))
+        required |= {c for c in program_reqs.get("math_requirements", {}) if MATH_ELECTIVE not in c}
+        electives = [c for c in courses if matches(c, req["valid_patterns"]) and c not in required]
+        requirements.append({
+            "title": "Program Electives",
+            "details": f"{len(electives)}/{req['required_count']} {req['description']}",
+            "completed": len(electives) >= req["required_count"]
+        })
+    for name, req in program_reqs.get("additional_requirements", {}).items():
+        count = sum(1 for c in courses if matches(c, req["valid_patterns"]))
+        requirements.append({
+            "title": name.replace("_", " ").title(),
+            "details": f"{count}/{req['required_count']} {req['description']}",
+            "completed": count >= req["required_count"]
+        })
+    return requirements
+
+def declared(profile):
+    return profile["majors"] + profile["minors"]
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_progress_matches_legacy_calculation(profile):
+    raw = degree_requirements.data()
+    completed = completed_courses(profile["courses_completed"])
+    for name in declared(profile):
+        program = degree_requirements.program(name)
+        expected = legacy_program_progress(profile["courses_completed"], program.spec, raw["valid_math_electives"])
+        assert calculate_program_progress(program, completed)["requirements"] == expected
+
+def test_math_elective_slots_need_different_courses():
+    program = degree_requirements.program(BS)
+    progress = calculate_program_progress(program, completed_courses(["MATH 2140"]))
+    electives = [r["completed"] for r in progress["requirements"] if r["details"] == "Any math elective from approved list"]
+    assert electives == [True, False, False]
+
+def test_required_math_course_is_not_a_math_elective():
+    program = degree_requirements.program(BS)
+    progress = calculate_program_progress(program, completed_courses(["MATH 1360"]))
+    assert sum(r["completed"] for r in progress["requirements"]) == 1
+
+def test_duplicate_courses_count_once():
+    once = calculate_progress({"courses_completed": ["COSC 2310"], "majors": [AB], "minors": []})
+    twice = calculate_progress({"courses_completed": ["COSC 2310", "COSC-2310"], "majors": [AB], "minors": []})
+    assert once == twice
+
+@pytest.mark.parametrize("all_programs", [False, True])
+def test_batch_audit_matches_progress_page(all_programs):
+    profiles = [(f"student{i}", profile) for i, profile in enumerate(PROFILES)]
+    rows = list(audit(profiles, all_programs=all_programs, workers=1))
+
+    expected = []
+    for user_id, profile in profiles:
+        completed = completed_courses(profile["courses_completed"])
+        names = list(degree_requirements.programs) if all_programs else declared(profile)
+        for name in names:
+            requirements = calculate_program_progress(degree_requirements.program(name), completed)["requirements"]
+            done = sum(r["completed"] for r in requirements)
+            expected.append((user_id, name, done, len(requirements), round(done / len(requirements) * 100, 1)))
+    assert [
+        (r["user_id"], r["program"], r["requirements_completed"], r["requirements_total"], r["progress"]) for r in rows
+    ] == expected
@@ -1,10 +1,10 @@
 import re
 from typing import Dict, List, Optional
-from datetime import datetime, time
-import json
-import os
-from langchain.tools import tool
+from datetime import datetime
+from langchain_core.tools import tool
 from flask import session
+from tools.catalog import SLOT_MINUTES, catalog, days_of_week, format_minutes, occupancy, parse_minutes
+from tools.user_store import CALENDAR, user_store
 
 DAY_MAPPING = {
     'monday': 1,
@@ -14,27 +14,28 @@ DAY_MAPPING = {
     'friday': 5
 }
 
+def empty_calendar_profile() -> Dict:
+    return {
+        'courses': [],
+        'last_updated': datetime.now().isoformat()
+    }
+
 def load_calendar_profile(username: str) -> Dict:
     """Load a user's calendar profile."""
-    profile_path = f'data/calendar_profiles/{username}.json'
-    try:
-        with open(profile_path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Create default calendar profile
-        default_profile = {
-            'courses': [],
-            'last_updated': datetime.now().isoformat()
-        }
-        save_calendar_profile(username, default_profile)
-        return default_profile
+    return user_store().get(CALENDAR, username) or empty_calendar_profile()
 
 def save_calendar_profile(username: str, profile_data: Dict):
     """Save a user's calendar profile."""
-    profile_path = f'data/calendar_profiles/{username}.json'
-    os.makedirs(os.path.dirname(profile_path), exist_ok=True)
-    with open(profile_path, 'w') as f:
-        json.dump(profile_data, f, indent=4)
+    user_store().put(CALENDAR, username, profile_data)
+
+def update_calendar_profile(username: str, fn) -> Optional[Dict]:
+    """Atomically modify a user's calendar profile (see UserStore.update), `fn` returns None to leave it unchanged."""
+    def apply(profile):
+        profile = fn(profile or empty_calendar_profile())
+        if profile is not None:
+            profile['last_updated'] = datetime.now().isoformat()
+        return profile
+    return user_store().update(CALENDAR, username, apply)
 
 def parse_meeting_details(meeting_details: str) -> Optional[Dict]:
     """Parse meeting details string into structured format.
@@ -72,58 +73,168 @@ def parse_meeting_details(meeting_details: str) -> Optional[Dict]:
         'schedule': meeting_details
     }
 
+def lookup_meeting_details(crn) -> Optional[Dict]:
+    """Meeting days/times of a section, pre-parsed in the catalog."""
+    section = catalog.section(crn)
+    if not section or not section['days']:
+        return None
+    return {
+        'daysOfWeek': days_of_week(section['days']),
+        'startTime': format_minutes(section['start_minute']),
+        'endTime': format_minutes(section['end_minute'])
+    }
+
+def meeting_occupancy(course: Dict) -> int:
+    """Weekly time-slot bitmask (see catalog.occupancy) of a course's daysOfWeek/startTime/endTime."""
+    days = sum(1 << (day - 1) for day in course['daysOfWeek'])
+    return occupancy(days, parse_minutes(course['startTime']), parse_minutes(course['endTime']))
+
+def entry_occupancy(course: Dict) -> int:
+    """Weekly time-slot bitmask of a calendar entry.
+
+    Stored (as hex, with the slot size it was built with) on the entry when it is added; entries
+    saved before that or with another slot size are computed from their times.
+    """
+    if 'occupancy' in course and course.get('slot_minutes') == SLOT_MINUTES:
+        return int(course['occupancy'], 16)
+    return meeting_occupancy(course)
+
+def find_conflicts(existing_schedule: List[Dict], new_course: Dict) -> List[Dict]:
+    """Existing courses whose meeting times overlap the new course."""
+    new_mask = entry_occupancy(new_course)
+    return [course for course in existing_schedule if entry_occupancy(course) & new_mask]
+
 def check_time_conflict(existing_schedule: List[Dict], new_course: Dict) -> bool:
     """Check if a new course conflicts with existing schedule."""
-    def parse_time(time_str: str) -> time:
-        """Helper function to parse time strings."""
-        return datetime.strptime(time_str.replace(' ', ''), '%I:%M%p').time()
-    
-    new_days = set(new_course['daysOfWeek'])
-    new_start = parse_time(new_course['startTime'])
-    new_end = parse_time(new_course['endTime'])
-    
-    return any(
-        any(day in new_days for day in course['daysOfWeek'])
-        and new_start < parse_time(course['endTime'])
-        and new_end > parse_time(course['startTime'])
-        for course in existing_schedule
-    )
+    return bool(find_conflicts(existing_schedule, new_course))
+
+def describe_conflicts(conflicts: List[Dict]) -> str:
+    return ", ".join(f"{c['title']} (CRN {c['crn']}, {c.get('schedule', '')})" for c in conflicts)
+
+class ScheduleConflict(ValueError):
+    """A course overlaps courses already in the schedule."""
+
+    def __init__(self, conflicts: List[Dict]):
+        super().__init__(f'Course conflicts with existing schedule: {describe_conflicts(conflicts)}')
+        self.conflicts = conflicts
+
+def _prepare_course(course_details: Dict, schedule: List[Dict]) -> Dict:
+    """Validate a course to add against the schedule, returning the entry to store.
+
+    Raises:
+        ValueError: If the course is invalid, already scheduled or conflicts with the schedule
+    """
+    if not isinstance(course_details, dict):
+        raise ValueError('Course details must be a dictionary')
+    required_fields = ['title', 'crn', 'instructor', 'schedule']
+    if missing := [f for f in required_fields if f not in course_details]:
+        raise ValueError(f'Missing required fields: {", ".join(missing)}')
+
+    if any(c['crn'] == course_details['crn'] for c in schedule):
+        raise ValueError(f'Course with CRN {course_details["crn"]} already exists')
+
+    # Use the catalog's parsed meeting times, parse the schedule text for unknown CRNs
+    meeting_info = lookup_meeting_details(course_details['crn']) or parse_meeting_details(course_details['schedule'])
+    if not meeting_info:
+        raise ValueError('Invalid course schedule format')
+
+    # Check conflicts (the occupancy mask is stored so later checks are a bitwise AND)
+    entry = {**course_details, **meeting_info}
+    entry['occupancy'] = hex(meeting_occupancy(entry))
+    entry['slot_minutes'] = SLOT_MINUTES
+    if conflicts := find_conflicts(schedule, entry):
+        raise ScheduleConflict(conflicts)
+    return entry
+
+def _item_error(item: Dict, error: Exception) -> Dict:
+    result = {**item, 'success': False, 'error': str(error)}
+    if isinstance(error, ScheduleConflict):
+        result['conflicts_with'] = [{'title': c['title'], 'crn': c['crn']} for c in error.conflicts]
+    return result
+
+def add_courses_to_schedule(courses: List[Dict]) -> Dict:
+    """Add several courses to the user's schedule in one step.
+
+    Every course is validated against the schedule and against the other courses being added;
+    the courses are only added (in one save) if all of them are valid.
+    """
+    username = session.get('username')
+    if not username:
+        return {'success': False, 'error': 'User not logged in'}
+    if not courses:
+        return {'success': False, 'error': 'No courses to add'}
+
+    results = []
+
+    def add(profile):
+        schedule = list(profile['courses'])
+        for course_details in courses:
+            item = {'title': course_details.get('title'), 'crn': course_details.get('crn')} if isinstance(course_details, dict) else {}
+            try:
+                schedule.append(_prepare_course(course_details, schedule))
+                results.append({**item, 'success': True})
+            except Exception as e:
+                results.append(_item_error(item, e))
+        if not all(r['success'] for r in results):
+            return None
+        profile['courses'] = schedule
+        return profile
+
+    if update_calendar_profile(username, add) is None:
+        return {
+            'success': False,
+            'error': 'No courses were added, fix the failed courses and add them all again',
+            'results': results
+        }
+
+    titles = ", ".join(str(r['title']) for r in results)
+    return {'success': True, 'message': f'Added {titles} to schedule', 'results': results}
 
 def add_course_to_schedule(course_details: Dict) -> Dict:
     """Add a course to the user's schedule if it doesn't conflict with existing courses."""
-    try:
-        # Check login and validate input
-        username = session.get('username')
-        if not username:
-            return {'success': False, 'error': 'User not logged in'}
-
-        required_fields = ['title', 'crn', 'instructor', 'schedule']
-        if missing := [f for f in required_fields if f not in course_details]:
-            return {'success': False, 'error': f'Missing required fields: {", ".join(missing)}'}
-
-        # Load profile and check for duplicates
-        profile = load_calendar_profile(username)
-        if any(c['crn'] == course_details['crn'] for c in profile['courses']):
-            return {'success': False, 'error': f'Course with CRN {course_details["crn"]} already exists'}
-
-        # Parse schedule
-        if not (meeting_info := parse_meeting_details(course_details['schedule'])):
-            return {'success': False, 'error': 'Invalid course schedule format'}
-            
-        # Check conflicts
-        course_details.update(meeting_info)
-        if check_time_conflict(profile['courses'], course_details):
-            return {'success': False, 'error': f'Course conflicts with existing schedule'}
-
-        # Add course and save
-        profile['last_updated'] = datetime.now().isoformat()
-        profile['courses'].append(course_details)
-        save_calendar_profile(username, profile)
-
-        return {'success': True, 'message': f'Added {course_details["title"]} to schedule'}
-
-    except Exception as e:
-        return {'success': False, 'error': str(e)}
+    result = add_courses_to_schedule([course_details])
+    if 'results' not in result:
+        return result
+    item = result['results'][0]
+    if not item['success']:
+        return {k: v for k, v in item.items() if k in ('success', 'error', 'conflicts_with')}
+    return {'success': True, 'message': f'Added {course_details["title"]} to schedule'}
+
+def sections_that_fit(course_number) -> Dict:
+    """Sections of a course that fit the current schedule (and what the others conflict with)."""
+    username = session.get('username')
+    if not username:
+        return {'success': False, 'error': 'User not logged in'}
+
+    course = catalog.course(course_number)
+    if not course:
+        return {'success': False, 'error': f'Course {course_number} not found'}
+
+    scheduled = [(c, entry_occupancy(c)) for c in load_calendar_profile(username)['courses']]
+    fits, conflicts = [], []
+    for section in catalog.sections_of(course_number):
+        details = {
+            'title': f"{course['title']} (Section {section['section']})",
+            'crn': section['crn'],
+            'instructor': section['instructor'],
+            'schedule': section['meeting_details']
+        }
+        if section['days']:
+            details['startTime'] = format_minutes(section['start_minute'])
+            details['endTime'] = format_minutes(section['end_minute'])
+        if any(c['crn'] == section['crn'] for c, _ in scheduled):
+            fits.append({**details, 'in_schedule': True})
+            continue
+        clashes = [c for c, mask in scheduled if mask & section['occupancy']]
+        if clashes:
+            conflicts.append({**details, 'conflicts_with': [{'title': c['title'], 'crn': c['crn']} for c in clashes]})
+        else:
+            fits.append(details)
+    return {'success': True, 'fits': fits, 'conflicts': conflicts}
+
+def without_occupancy(courses: List[Dict]) -> List[Dict]:
+    """Calendar entries without the internal occupancy masks (as shown to the agent and the browser)."""
+    return [{k: v for k, v in c.items() if k not in ('occupancy', 'slot_minutes')} for c in courses]
 
 def view_schedule() -> Dict:
     """View the current schedule."""
@@ -145,24 +256,48 @@ def view_schedule() -> Dict:
     
     return {
         'success': True,
-        'courses': calendar_profile['courses']
+        'courses': without_occupancy(calendar_profile['courses'])
     }
 
-def remove_course_from_schedule(crn: int) -> Dict:
-    """Remove a course from the schedule by CRN."""
+def remove_courses_from_schedule(crns: List[int]) -> Dict:
+    """Remove several courses from the schedule by CRN in one step (nothing is removed if any CRN isn't scheduled)."""
     username = session.get('username')
     if not username:
         return {'success': False, 'error': 'User not logged in'}
-    
-    profile = load_calendar_profile(username)
-    original_courses = profile['courses']
-    profile['courses'] = [c for c in original_courses if c['crn'] != crn]
-    
-    if len(profile['courses']) == len(original_courses):
-        return {'success': False, 'error': f'Course with CRN {crn} not found'}
-    
-    profile['last_updated'] = datetime.now().isoformat()
-    save_calendar_profile(username, profile)
+    if not crns:
+        return {'success': False, 'error': 'No CRNs to remove'}
+
+    results = []
+
+    def remove(profile):
+        scheduled = {c['crn']: c for c in profile['courses']}
+        results.extend(
+            {'crn': crn, 'title': scheduled[crn]['title'], 'success': True} if crn in scheduled
+            else {'crn': crn, 'success': False, 'error': f'Course with CRN {crn} not found'}
+            for crn in dict.fromkeys(crns)
+        )
+        if not all(r['success'] for r in results):
+            return None
+        removed = set(crns)
+        profile['courses'] = [c for c in profile['courses'] if c['crn'] not in removed]
+        return profile
+
+    if update_calendar_profile(username, remove) is None:
+        return {
+            'success': False,
+            'error': 'No courses were removed, some CRNs are not in the schedule',
+            'results': results
+        }
+
+    return {'success': True, 'message': f'Removed {len(results)} courses from schedule', 'results': results}
+
+def remove_course_from_schedule(crn: int) -> Dict:
+    """Remove a course from the schedule by CRN."""
+    result = remove_courses_from_schedule([crn])
+    if 'results' not in result:
+        return result
+    if not result['success']:
+        return {'success': False, 'error': result['results'][0]['error']}
     return {'success': True, 'message': f'Removed course with CRN {crn}'}
 
 def clear_schedule() -> Dict:
@@ -171,23 +306,28 @@ def clear_schedule() -> Dict:
     if not username:
         return {'success': False, 'error': 'User not logged in'}
     
-    profile = load_calendar_profile(username)
-    if not profile['courses']:
+    removed = []
+
+    def clear(profile):
+        if not profile['courses']:
+            return None
+        removed.extend(profile['courses'])
+        profile['courses'] = []
+        return profile
+
+    if update_calendar_profile(username, clear) is None:
         return {'success': True, 'message': 'Schedule is already empty'}
     
-    course_count = len(profile['courses'])
-    profile['courses'] = []
-    profile['last_updated'] = datetime.now().isoformat()
-    save_calendar_profile(username, profile)
-    
-    return {'success': True, 'message': f'Removed {course_count} courses from schedule'}
+    return {'success': True, 'message': f'Removed {len(removed)} courses from schedule'}
 
 @tool
-def calendar_tool(action: str, course_details: Dict = None, crn: int = None) -> Dict:
-    """Manage the visual schedule. Can add/remove courses and view the current schedule.
+def calendar_tool(action: str, course_details: Optional[Dict] = None, crn: Optional[int] = None,
+                  course_number: Optional[str] = None, courses: Optional[List[Dict]] = None,
+                  crns: Optional[List[int]] = None) -> Dict:
+    """Manage the visual schedule. Can add/remove courses, view the current schedule and find sections that fit it.
     
     Args:
-        action (str): The action to perform: "add", "remove", "view", or "clear"
+        action (str): The action to perform: "add", "remove", "view", "clear", or "fit"
         course_details (Dict, optional): For "add" action, the course information containing:
             - title: str
             - crn: int
@@ -196,18 +336,29 @@ def calendar_tool(action: str, course_details: Dict = None, crn: int = None) ->
             - startTime: str
             - endTime: str
         crn (int, optional): The Course Reference Number for remove action
+        courses (List[Dict], optional): For "add" action, several courses (each like course_details) to add at once.
+            They are checked against the schedule and each other, and added only if all of them can be
+        crns (List[int], optional): For "remove" action, several CRNs to remove at once (only if all are scheduled)
+        course_number (str, optional): For "fit" action, the course (e.g. "COSC 2010") whose sections
+            should be checked against the current schedule
         
     Returns:
         dict: Operation result with success status and relevant data
     """
     if action == "view":
         return view_schedule()
+    elif action == "add" and courses:
+        return add_courses_to_schedule(courses + ([course_details] if course_details else []))
     elif action == "add" and course_details is not None:
         return add_course_to_schedule(course_details)
+    elif action == "remove" and crns:
+        return remove_courses_from_schedule(crns + ([crn] if crn is not None else []))
     elif action == "remove" and crn is not None:
         return remove_course_from_schedule(crn)
     elif action == "clear":
         return clear_schedule()
+    elif action == "fit" and course_number is not None:
+        return sections_that_fit(course_number)
     else:
         return {
             'success': False,
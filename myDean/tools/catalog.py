@@ -0,0 +1,394 @@
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+COURSES_DB = "data/courses.db"
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+# Meeting days are stored as a bitmask: Monday = 1, Tuesday = 2, Wednesday = 4, ...
+DAY_BITS = {day.lower(): 1 << i for i, day in enumerate(WEEKDAYS)}
+
+MEETING_PATTERN = re.compile(
+    r'(?P<start>\d{1,2}:\d{2}\s*(?:AM|PM))\s*-\s*'
+    r'(?P<end>\d{1,2}:\d{2}\s*(?:AM|PM))\s+on\s+'
+    r'(?P<days>[A-Za-z]+(?:\s+and\s+[A-Za-z]+)*)',
+    re.IGNORECASE
+)
+MEETING_FIELD_PATTERN = re.compile(r'(Type|Building|Room):\s*([^,]+)')
+
+# Tokens of a "Prerequisites" string: "Computer Science II (1030) and [Math Methods for Comp Sci (1110) or MATH 2800]"
+PREREQUISITE_TOKEN = re.compile(
+    r'\((?P<cosc>\d{4})\)|\b(?P<subject>[A-Z]{3,4})[ -]?(?P<number>\d{3,4})\b|\b(?P<op>(?i:and|or))\b|(?P<bracket>[\[\]])'
+)
+
+# Department of the catalog (course numbers in "courses" have no subject)
+SUBJECT = "COSC"
+
+# A course code with an optional subject: "COSC 1030", "cosc-1030", "COSC1030" or "1030"
+COURSE_CODE = re.compile(r"\s*(?:([A-Za-z]{3,4})[\s-]*)?(\d{3,4})\s*")
+
+# One row per course, one row per section (keyed by CRN) with its parsed meeting time.
+# "courses" is a view with the columns of the original flat table, for the SQL toolkit.
+CATALOG_SCHEMA = """
+CREATE TABLE course (
+    course_number INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    prerequisites TEXT
+);
+
+CREATE TABLE section (
+    crn INTEGER PRIMARY KEY,
+    course_number INTEGER NOT NULL REFERENCES course (course_number),
+    section INTEGER,
+    instructor TEXT,
+    meeting_details TEXT,
+    enrollment_status TEXT,
+    notes TEXT,             -- section-specific text that followed the course description
+    days INTEGER,           -- bitmask, Monday = 1 ... Friday = 16
+    start_minute INTEGER,   -- minutes after midnight
+    end_minute INTEGER,
+    meeting_type TEXT,
+    building TEXT,
+    room TEXT
+);
+
+-- Covering indexes for lookups by course number and by instructor (CRN is the primary key)
+CREATE INDEX section_course_number ON section (
+    course_number, section, crn, instructor, days, start_minute, end_minute
+);
+CREATE INDEX section_instructor ON section (instructor, course_number, crn);
+
+-- Parsed "prerequisites": a course can be taken once every required_course of ANY one option is completed
+CREATE TABLE prerequisite (
+    course_number INTEGER NOT NULL REFERENCES course (course_number),
+    option INTEGER NOT NULL,
+    required_course TEXT NOT NULL,  -- e.g. "COSC 1030", "MATH 2800"
+    PRIMARY KEY (course_number, option, required_course)
+) WITHOUT ROWID;
+CREATE INDEX prerequisite_required_course ON prerequisite (required_course, course_number);
+"""
+
+# Computed view columns have no declared type, so this DDL is also what the SQL tools show for "courses"
+COURSES_VIEW = """CREATE VIEW courses AS
+SELECT
+    c.title AS "Title",
+    c.course_number AS "Course Number",
+    s.crn AS "CRN",
+    s.section AS "Section",
+    s.instructor AS "Instructor",
+    s.meeting_details AS "Meeting Details",
+    s.enrollment_status AS "Enrollment Status",
+    c.description || COALESCE(s.notes, '') AS "Course Description",
+    c.prerequisites AS "Prerequisites"
+FROM section s
+JOIN course c ON c.course_number = s.course_number"""
+
+SOURCE_COLUMNS = '''"Title", "Course Number", "CRN", "Section", "Instructor", "Meeting Details",
+    "Enrollment Status", "Course Description", "Prerequisites"'''
+
+def parse_minutes(time_str: str) -> int:
+    """Minutes after midnight of a 12-hour time such as "03:30 PM" or "03:30PM"."""
+    match = re.fullmatch(r'(\d{1,2}):(\d{2})\s*(AM|PM)', time_str.strip(), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid time: {time_str}")
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3).upper()
+    return (hour % 12 + (12 if meridiem == "PM" else 0)) * 60 + minute
+
+def format_minutes(minutes: int) -> str:
+    """12-hour time without a space (e.g. "03:30PM"), as stored in calendar profiles."""
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1:02d}:{minute:02d}{'PM' if hour >= 12 else 'AM'}"
+
+# Weekly occupancy bitmask: one bit per SLOT_MINUTES of each weekday
+# (one minute, so meetings at times off a coarser grid aren't rounded into each other)
+SLOT_MINUTES = 1
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+def occupancy(days: Optional[int], start_minute: Optional[int], end_minute: Optional[int]) -> int:
+    """Bitmask of the weekly time slots a meeting occupies (0 if it has no parsed time).
+
+    Two meetings overlap exactly when their masks share a bit.
+    """
+    if not days:
+        return 0
+    first = start_minute // SLOT_MINUTES
+    last = -(-end_minute // SLOT_MINUTES)  # round up (end exclusive): the meeting occupies every slot it touches
+    day_mask = ((1 << (last - first)) - 1) << first
+    result = 0
+    for i in range(len(WEEKDAYS)):
+        if days & (1 << i):
+            result |= day_mask << (i * SLOTS_PER_DAY)
+    return result
+
+def days_of_week(mask: int) -> List[int]:
+    """Calendar day numbers (Monday = 1) of a day bitmask."""
+    return [i + 1 for i in range(len(WEEKDAYS)) if mask & (1 << i)]
+
+def course_code(subject: str, number) -> str:
+    """Canonical course code, e.g. "COSC 1030"."""
+    return f"{subject.upper()} {int(number)}"
+
+def parse_prerequisites(text: Optional[str]) -> List[List[str]]:
+    """Parse a "Prerequisites" string into options (OR) of required course codes (AND).
+
+    "and" binds tighter than "or" and [...] groups, e.g.
+    "Computer Science II (1030) and [Math Methods for Comp Sci (1110) or MATH 2800]"
+    -> [["COSC 1030", "COSC 1110"], ["COSC 1030", "MATH 2800"]]
+    An empty list means no prerequisites.
+    """
+    tokens = []
+    for match in PREREQUISITE_TOKEN.finditer(text or ""):
+        if match.group("cosc"):
+            tokens.append(course_code(SUBJECT, match.group("cosc")))
+        elif match.group("subject"):
+            tokens.append(course_code(match.group("subject"), match.group("number")))
+        else:
+            tokens.append((match.group("op") or match.group("bracket")).lower())
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def expression():  # term (or term)*
+        nonlocal position
+        options = term()
+        while peek() == "or":
+            position += 1
+            options = options + term()
+        return options
+
+    def term():  # factor (and factor)*
+        nonlocal position
+        options = factor()
+        while peek() == "and":
+            position += 1
+            right = factor()
+            options = [a + b for a in options for b in right]
+        return options
+
+    def factor():  # course | [ expression ]
+        nonlocal position
+        token = peek()
+        position += 1
+        if token == "[":
+            options = expression()
+            if peek() != "]":
+                raise ValueError(f"Unbalanced brackets in prerequisites: {text}")
+            position += 1
+            return options
+        if token is None or token in ("and", "or", "]"):
+            raise ValueError(f"Invalid prerequisites: {text}")
+        return [[token]]
+
+    if not tokens:
+        return []
+    options = expression()
+    if peek() is not None:
+        raise ValueError(f"Invalid prerequisites: {text}")
+    # Drop duplicate courses within an option and duplicate options
+    unique = {tuple(sorted(set(option))) for option in options}
+    return [list(option) for option in sorted(unique)]
+
+def parse_meeting(meeting_details: str) -> Optional[Dict]:
+    """Parse a "Meeting Details" string into its day bitmask, start/end minutes and location.
+
+    Expected format: "12:30 PM - 01:45 PM on Monday and Wednesday, Type: Lecture, Building: Reiss, Room: 283"
+    """
+    if not meeting_details:
+        return None
+    match = MEETING_PATTERN.search(meeting_details)
+    if not match:
+        return None
+
+    days = 0
+    for day in match.group("days").lower().split(" and "):
+        days |= DAY_BITS.get(day.strip(), 0)
+    if not days:
+        return None
+
+    fields = {key.lower(): value.strip() for key, value in MEETING_FIELD_PATTERN.findall(meeting_details)}
+    return {
+        "days": days,
+        "start_minute": parse_minutes(match.group("start")),
+        "end_minute": parse_minutes(match.group("end")),
+        "meeting_type": fields.get("type"),
+        "building": fields.get("building"),
+        "room": fields.get("room")
+    }
+
+def ingest(path: str = COURSES_DB, source: Optional[str] = None) -> Dict[str, int]:
+    """(Re)build the course/section tables from a flat "courses" table.
+
+    The source is the flat table (or compatibility view) named "courses" in `source`,
+    which defaults to the catalog database itself, so the step can be re-run.
+
+    Returns:
+        Number of courses, sections and prerequisite rows loaded
+    """
+    with sqlite3.connect(source or path) as conn:
+        rows = conn.execute(f"SELECT {SOURCE_COLUMNS} FROM courses").fetchall()
+
+    descriptions = {}
+    for title, number, *_, description, prerequisites in rows:
+        descriptions.setdefault(number, []).append(description or "")
+
+    courses, sections, prerequisite_rows = {}, [], []
+    for title, number, crn, section, instructor, details, status, description, prerequisites in rows:
+        if number not in courses:
+            # Some sections append a note (e.g. reserved seats) to the shared description
+            shared = min(descriptions[number], key=len)
+            if not all(text.startswith(shared) for text in descriptions[number]):
+                shared = descriptions[number][0]
+            courses[number] = (number, title, shared, prerequisites)
+            for option, required in enumerate(parse_prerequisites(prerequisites)):
+                prerequisite_rows.extend((number, option, code) for code in required)
+        shared = courses[number][2]
+        notes = description[len(shared):] if description and description.startswith(shared) else None
+        meeting = parse_meeting(details) or {}
+        sections.append((
+            crn, number, section, instructor, details, status, notes or None,
+            meeting.get("days"), meeting.get("start_minute"), meeting.get("end_minute"),
+            meeting.get("meeting_type"), meeting.get("building"), meeting.get("room")
+        ))
+
+    conn = sqlite3.connect(path)
+    try:
+        existing = conn.execute(
+            "SELECT type, name FROM sqlite_master WHERE name IN ('courses', 'prerequisite', 'section', 'course')"
+        ).fetchall()
+        drops = "".join(f"DROP {kind.upper()} {name};\n" for kind, name in existing)
+        # Swap in the new tables in a single transaction
+        conn.executescript(f"BEGIN;\n{drops}{CATALOG_SCHEMA}{COURSES_VIEW};")
+        conn.executemany("INSERT INTO course VALUES (?, ?, ?, ?)", courses.values())
+        conn.executemany("INSERT INTO section VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", sections)
+        conn.executemany("INSERT INTO prerequisite VALUES (?, ?, ?)", prerequisite_rows)
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    # The full-text index is built from the new tables
+    from tools.course_search_tool import ensure_fts_index
+    ensure_fts_index(path, rebuild=True)
+    return {"courses": len(courses), "sections": len(sections), "prerequisites": len(prerequisite_rows)}
+
+def course_number_of(value) -> Optional[int]:
+    """Course number from 1030, "1030", "COSC 1030" or "COSC-1030" (None for other departments, e.g. "MATH 1010")."""
+    match = COURSE_CODE.fullmatch(str(value))
+    if not match or (match.group(1) and match.group(1).upper() != SUBJECT):
+        return None
+    return int(match.group(2))
+
+def normalize_instructor(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z]+", " ", name.lower()).split())
+
+class CatalogIndex:
+    """In-memory copy of the catalog keyed by course number, CRN and instructor.
+
+    Loaded on first use and reloaded when courses.db changes on disk (checked by mtime),
+    so lookups are dict reads instead of SQL round trips.
+    """
+
+    def __init__(self, path: str = COURSES_DB):
+        self.path = path
+        self.mtime = None
+        self.courses: Dict[int, Dict] = {}
+        self.sections: Dict[int, Dict] = {}
+        self.by_instructor: Dict[str, List[int]] = {}
+        # (courses, sections, by_instructor) of one load, swapped in a single assignment
+        self.snapshot = (self.courses, self.sections, self.by_instructor)
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.mtime:
+            return
+        with self._lock:
+            if mtime == self.mtime:
+                return
+            with sqlite3.connect(f"file:{self.path}?mode=ro", uri=True) as conn:
+                conn.row_factory = sqlite3.Row
+                courses = {
+                    row["course_number"]: dict(row, crns=[])
+                    for row in conn.execute("SELECT * FROM course")
+                }
+                sections = {
+                    row["crn"]: dict(row, occupancy=occupancy(row["days"], row["start_minute"], row["end_minute"]))
+                    for row in conn.execute("SELECT * FROM section ORDER BY course_number, section")
+                }
+                for course in courses.values():
+                    course["prerequisite_options"] = []
+                for number, option, required in conn.execute(
+                    "SELECT course_number, option, required_course FROM prerequisite ORDER BY course_number, option"
+                ):
+                    options = courses[number]["prerequisite_options"]
+                    if len(options) == option:
+                        options.append([])
+                    options[option].append(required)
+            by_instructor = {}
+            for crn, section in sections.items():
+                courses[section["course_number"]]["crns"].append(crn)
+                if section["instructor"]:
+                    by_instructor.setdefault(normalize_instructor(section["instructor"]), []).append(crn)
+            self.snapshot = (courses, sections, by_instructor)
+            self.courses, self.sections, self.by_instructor = self.snapshot
+            self.mtime = mtime
+
+    def all_courses(self) -> Dict[int, Dict]:
+        """Every course by number (a new dict after each reload)."""
+        self._refresh()
+        return self.courses
+
+    def course(self, course_number) -> Optional[Dict]:
+        self._refresh()
+        return self.courses.get(course_number_of(course_number))
+
+    def section(self, crn) -> Optional[Dict]:
+        self._refresh()
+        try:
+            return self.sections.get(int(crn))
+        except (TypeError, ValueError):
+            return None
+
+    def _loaded(self):
+        """Courses, sections and instructor index of the same load (a concurrent reload can't mix them)."""
+        self._refresh()
+        return self.snapshot
+
+    def sections_of(self, course_number) -> List[Dict]:
+        courses, sections, _ = self._loaded()
+        course = courses.get(course_number_of(course_number))
+        return [sections[crn] for crn in course["crns"]] if course else []
+
+    def sections_by_instructor(self, instructor: str) -> List[Dict]:
+        """Sections taught by an instructor, matching the full name or any part of it (e.g. a last name)."""
+        _, sections, by_instructor = self._loaded()
+        query = normalize_instructor(instructor)
+        if query in by_instructor:
+            crns = by_instructor[query]
+        else:
+            tokens = set(query.split())
+            crns = [
+                crn for name, name_crns in by_instructor.items()
+                if tokens and tokens <= set(name.split())
+                for crn in name_crns
+            ]
+        return [sections[crn] for crn in crns]
+
+# Shared by the lookup tools, calendar and planning code
+catalog = CatalogIndex()
+
+if __name__ == "__main__":
+    # Ingest step: python -m tools.catalog [--source flat_export.db]
+    parser = argparse.ArgumentParser(description="Build the normalized course/section catalog.")
+    parser.add_argument("--db", default=COURSES_DB)
+    parser.add_argument("--source", help='Database with a flat "courses" table (defaults to --db)')
+    args = parser.parse_args()
+
+    counts = ingest(args.db, args.source)
+    print(f"Loaded {counts['courses']} courses, {counts['sections']} sections and {counts['prerequisites']} prerequisites.")
@@ -0,0 +1,123 @@
+import argparse
+import time
+from typing import Dict, List, Union
+from langchain_core.tools import tool
+from tools.catalog import catalog, format_minutes
+
+def _section_details(section: Dict) -> Dict:
+    """Section fields, including the times in the format calendar_tool expects."""
+    details = {
+        "crn": section["crn"],
+        "section": section["section"],
+        "instructor": section["instructor"],
+        "schedule": section["meeting_details"],
+        "enrollment_status": section["enrollment_status"]
+    }
+    if section["days"]:
+        details["startTime"] = format_minutes(section["start_minute"])
+        details["endTime"] = format_minutes(section["end_minute"])
+    if section["notes"]:
+        details["notes"] = section["notes"].strip()
+    return details
+
+def _course_details(course: Dict, include_description: bool = True) -> Dict:
+    details = {
+        "course_number": course["course_number"],
+        "title": course["title"],
+        "prerequisites": course["prerequisites"]
+    }
+    if include_description:
+        details["description"] = course["description"]
+    return details
+
+@tool
+def get_course(course_number: Union[int, str]) -> Dict:
+    """Look up a course by its course number (e.g. 1030, "1030" or "COSC-1030").
+    Returns the title, description, prerequisites and every section (CRN, instructor, meeting times,
+    enrollment status) in one call. Use this instead of SQL when the user refers to a course by number."""
+    course = catalog.course(course_number)
+    if not course:
+        return {"success": False, "error": f"No course with number {course_number}"}
+    return {
+        "success": True,
+        **_course_details(course),
+        "sections": [_section_details(section) for section in catalog.sections_of(course_number)]
+    }
+
+@tool
+def get_sections_by_crn(crns: List[int]) -> Dict:
+    """Look up one or more sections by CRN (Course Reference Number).
+    Returns each section's course number, title, instructor, meeting times and enrollment status."""
+    sections, missing = [], []
+    for crn in crns:
+        section = catalog.section(crn)
+        if not section:
+            missing.append(crn)
+            continue
+        course = catalog.course(section["course_number"])
+        sections.append({**_course_details(course, include_description=False), **_section_details(section)})
+    result = {"success": bool(sections), "sections": sections}
+    if missing:
+        result["not_found"] = missing
+    return result
+
+@tool
+def find_courses_by_instructor(instructor: str) -> Dict:
+    """Find the courses (and sections) taught by an instructor. Accepts the full name as stored
+    (e.g. "Montgomery, Jami") or a last name. If nothing is found, look the name up with search_proper_nouns."""
+    sections = catalog.sections_by_instructor(instructor)
+    if not sections:
+        return {"success": False, "error": f"No sections taught by '{instructor}'"}
+    courses = {}
+    for section in sections:
+        number = section["course_number"]
+        if number not in courses:
+            courses[number] = {**_course_details(catalog.course(number), include_description=False), "sections": []}
+        courses[number]["sections"].append(_section_details(section))
+    return {"success": True, "courses": list(courses.values())}
+
+catalog_tools = [get_course, get_sections_by_crn, find_courses_by_instructor]
+
+def benchmark(repeat: int = 200):
+    """Time the lookup tools against running the equivalent SQL through the SQL toolkit's query tool.
+
+    Only measures execution; the toolkit path additionally costs one LLM round trip for each of
+    sql_db_list_tables, sql_db_schema, sql_db_query_checker and sql_db_query.
+    """
+    from langchain_community.tools.sql_database.tool import QuerySQLDataBaseTool
+    from langchain_community.utilities import SQLDatabase
+
+    db = SQLDatabase.from_uri("sqlite:///data/courses.db", include_tables=["course", "section", "courses"],
+                              view_support=True, max_string_length=3000)
+    query_tool = QuerySQLDataBaseTool(db=db)
+    cases = [
+        ("course by number", get_course, {"course_number": "COSC-1030"},
+         'SELECT * FROM courses WHERE "Course Number" = 1030'),
+        ("section by CRN", get_sections_by_crn, {"crns": [48062]},
+         'SELECT * FROM courses WHERE "CRN" = 48062'),
+        ("courses by instructor", find_courses_by_instructor, {"instructor": "Montgomery"},
+         'SELECT * FROM courses WHERE "Instructor" LIKE \'%Montgomery%\''),
+    ]
+    catalog.course(0)  # load the index
+    for name, lookup_tool, args, sql in cases:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            lookup_tool.invoke(args)
+        lookup_ms = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            query_tool.invoke({"query": sql})
+        sql_ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name}: lookup tool {lookup_ms:.3f} ms (1 tool call), "
+              f"sql_db_query {sql_ms:.3f} ms (4 tool calls with list_tables/schema/query_checker)")
+
+if __name__ == "__main__":
+    # python -m tools.catalog_tool --benchmark
+    parser = argparse.ArgumentParser(description="Catalog lookup tools.")
+    parser.add_argument("--benchmark", action="store_true", help="Compare with the SQL toolkit path")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.repeat)
@@ -1,14 +1,19 @@
+import argparse
 import pickle
 import os
 from operator import itemgetter
+import numpy as np
 from langchain.prompts import PromptTemplate
 from langchain.text_splitter import MarkdownTextSplitter
 from langchain_community.document_loaders import ToMarkdownLoader
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.vectorstores import DocArrayInMemorySearch
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from dotenv import load_dotenv
 from langchain.tools import tool
+from tools.embedding_cache import EmbeddingCache
+from tools.warmup import LazyResource
 
 # Load API keys from .env
 load_dotenv()
@@ -16,9 +21,9 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 markdown_api_key = os.getenv("2MARKDOWN_API_KEY")
 
 # Function to load/scrape Gtown COSC bulletin and split the content (using markdown language)
-def load_or_scrape_content(file_path):
-    # If file exists:
-    if os.path.exists(file_path):
+def load_or_scrape_content(file_path, rescrape=False):
+    # If file exists (and a fresh scrape wasn't requested):
+    if os.path.exists(file_path) and not rescrape:
         with open(file_path, 'rb') as file:
             documents = pickle.load(file)
             print("Loaded cosc bulletin content from pkl file.")
@@ -43,24 +48,27 @@ def load_or_scrape_content(file_path):
 
     return documents
 
-# Load or scrape the content
+# Prebuilt chunk vectors (float32 matrix + chunk texts/hashes), see load_bulletin_vectorstore
+BULLETIN_STORE = "./data/bulletin_store"
+
+def load_bulletin_vectorstore(documents, embeddings):
+    """Build the bulletin vector store from prebuilt chunk vectors.
+
+    Chunks are versioned by content hash, so no embedding API calls are made unless
+    chunks changed after a re-scrape (and then only those chunks are embedded).
+    """
+    texts = [doc.page_content for doc in documents]
+    vectors = EmbeddingCache(BULLETIN_STORE, embeddings).embed(texts)
+    # Inner product over unit-length chunk vectors ranks by cosine similarity, like the old in-memory store
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return FAISS.from_embeddings(
+        list(zip(texts, vectors.tolist())),
+        embeddings,
+        metadatas=[doc.metadata for doc in documents],
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+
 file_path = "./data/georgetown_coscs_bulletin.pkl"
-documents = load_or_scrape_content(file_path)
-
-# Load the content into a vector store
-vectorstore = DocArrayInMemorySearch.from_documents(
-    documents, embedding=OpenAIEmbeddings()
-)
-
-# Configure retriever with specific parameters
-retriever = vectorstore.as_retriever(
-    search_type="similarity",
-    search_kwargs={
-        "k": 3,  # Number of relevant chunks to return
-        "score_threshold": 0.7,  # Only return results above this similarity score
-        "fetch_k": 5  # Fetch more candidates than k for better filtering
-    }
-)
 
 # Prepare the prompt template
 template = """
@@ -79,22 +87,51 @@ Exclude any irrelevant or redundant information.
 """
 prompt = PromptTemplate.from_template(template)
 
-model = ChatOpenAI(openai_api_key=openai_api_key, model="gpt-4o-mini")  # Can use a smaller model
-parser = StrOutputParser()
+def build_chain(rescrape=False):
+    # Load or scrape the content
+    documents = load_or_scrape_content(file_path, rescrape=rescrape)
+
+    # Load the content into a vector store
+    vectorstore = load_bulletin_vectorstore(documents, OpenAIEmbeddings())
+
+    # Configure retriever with specific parameters
+    retriever = vectorstore.as_retriever(
+        search_type="similarity",
+        search_kwargs={
+            "k": 3,  # Number of relevant chunks to return
+            # No score_threshold: the previous in-memory store ignored it and FAISS would enforce it
+            "fetch_k": 5  # Fetch more candidates than k for better filtering
+        }
+    )
+
+    model = ChatOpenAI(openai_api_key=openai_api_key, model="gpt-4o-mini")  # Can use a smaller model
+    parser = StrOutputParser()
+
+    return (
+        {
+            "context": itemgetter("question") | retriever,
+            "question": itemgetter("question"),
+        }
+        | prompt
+        | model
+        | parser
+    )
 
-chain = (
-    {
-        "context": itemgetter("question") | retriever,
-        "question": itemgetter("question"),
-    }
-    | prompt
-    | model
-    | parser
-)
+# Built on first use (or by the background warm-up), not at import
+bulletin_chain = LazyResource("bulletin_store", build_chain)
 
 @tool
 def cosc_expert_tool(query: str) -> str:
     """Tool for retrieving relevant context about the COSC program from the Georgetown bulletin.
     Returns precise excerpts about course requirements, prerequisites, and program policies."""
-    result = chain.invoke({"question": query})
-    return result
\ No newline at end of file
+    result = bulletin_chain.get().invoke({"question": query})
+    return result
+
+if __name__ == "__main__":
+    # Offline build step: python -m tools.cosc_expert_tool [--rescrape]
+    parser = argparse.ArgumentParser(description="Build the prebuilt bulletin vector store.")
+    parser.add_argument("--rescrape", action="store_true", help="Scrape the bulletin again before building")
+    args = parser.parse_args()
+
+    build_chain(rescrape=args.rescrape)
+    print("Bulletin store is up to date.")
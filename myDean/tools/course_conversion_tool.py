@@ -1,4 +1,7 @@
-from langchain.tools import tool
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+from langchain_core.tools import tool
 
 # Conversion dictionary from old course numbers to new course numbers
 conversion_table = {
@@ -189,33 +192,64 @@ conversion_table = {
     "MATH 999": "MATH 9999"
 }
 
-def normalize_course_numbers(course_list):
-    """Core function to convert course numbers from old format to new format."""
-    normalized_list = []
+# Subject, separator and number of a course code: "COSC 051", "cosc-051", "COSC051", "COSC 1020", "MATH 04-"
+COURSE_CODE = re.compile(r"\s*([A-Za-z]{2,5})\s*([-\s]?)\s*(\d{3}[\dXx]|\d{3}|\d{2}-)\s*")
+
+# conversion_table as (subject, old number) -> new number, and new course -> old course
+_old_to_new: Dict[tuple, str] = {}
+new_to_old: Dict[str, str] = {}
+for _old, _new in conversion_table.items():
+    _subject, _number = _old.split(" ")
+    _old_to_new[(_subject, _number)] = _new.split(" ")[1]
+    new_to_old[_new] = _old
+
+@lru_cache(maxsize=4096)
+def convert_course_number(course: str) -> Optional[str]:
+    """A course code in the new format, None if it isn't a course code or its old number is unknown.
+
+    New (4-digit) numbers are kept, old (3-digit) numbers are looked up in conversion_table.
+    The result is "SUBJ-1234" if the input used a hyphen, "SUBJ 1234" otherwise.
+    """
+    match = COURSE_CODE.fullmatch(course)
+    if not match:
+        return None
+    subject, separator, number = match.groups()
+    subject, number = subject.upper(), number.upper()
+    if len(number) != 4:
+        number = _old_to_new.get((subject, number))
+        if number is None:
+            return None
+    return f"{subject}{'-' if separator == '-' else ' '}{number}"
+
+def convert_course_numbers(course_list: Iterable[str]) -> Dict[str, List[str]]:
+    """Convert a batch of course codes.
+
+    Returns:
+        "courses": the converted codes in input order, "unrecognized": the inputs that couldn't be converted
+    """
+    courses, unrecognized = [], []
     for course in course_list:
-        # Skip invalid formats
-        if '--' in course:
-            continue
-            
-        # Convert hyphenated format to space format for lookup
-        space_format = course.replace('-', ' ')
-        
-        # If the course is already in the new format (4-digit number), keep it as is
-        if any(str(i) in space_format.split()[-1] for i in range(1000, 10000)):
-            normalized_list.append(course)  # Keep original format
+        converted = convert_course_number(str(course))
+        if converted is None:
+            unrecognized.append(course)
         else:
-            # Try to normalize the course
-            normalized = conversion_table.get(space_format, space_format)
-            # Convert back to hyphen format if input was hyphenated
-            if '-' in course:
-                normalized = normalized.replace(' ', '-')
-            # Only add if it was successfully normalized
-            if normalized != course or any(str(i) in normalized.replace('-', ' ').split()[-1] for i in range(1000, 10000)):
-                normalized_list.append(normalized)
-    
-    return normalized_list
+            courses.append(converted)
+    return {"courses": courses, "unrecognized": unrecognized}
+
+def normalize_course_numbers(course_list):
+    """Core function to convert course numbers from old format to new format (unrecognized codes are dropped)."""
+    return convert_course_numbers(course_list)["courses"]
+
+def old_course_number(course: str) -> Optional[str]:
+    """The old number of a new course code ("COSC 1020" or "COSC-1020" -> "COSC 051"), None if it has none."""
+    converted = convert_course_number(str(course))
+    return new_to_old.get(converted.replace("-", " ")) if converted else None
 
 @tool
-def normalize_courses(course_list):
-    """Tool for converting course numbers from old format to new format."""
-    return normalize_course_numbers(course_list)
\ No newline at end of file
+def normalize_courses(course_list: List[str]) -> Dict[str, List[str]]:
+    """Tool for converting course numbers from old format to new format.
+
+    Returns the converted course numbers ("courses") and the ones that aren't course numbers
+    or have no known conversion ("unrecognized").
+    """
+    return convert_course_numbers(course_list)
@@ -0,0 +1,137 @@
+import argparse
+import re
+import sqlite3
+from langchain_core.tools import tool
+from tools.catalog import SUBJECT, course_code
+from tools.warmup import LazyResource
+
+COURSES_DB = "data/courses.db"
+
+# Full-text index over the searchable columns of the catalog, one row per course (rowid = course number)
+FTS_TABLE = "courses_fts"
+
+# bm25() column weights: title, description, instructor, prerequisites (course_number is unindexed).
+# Instructor names rarely share terms with topics, so a name query still finds its courses
+# while a topic that happens to match a name doesn't outrank courses describing it.
+BM25_WEIGHTS = (0.0, 10.0, 1.0, 0.5, 0.5)
+
+# Indexed values of a course (instructors of all its sections are combined)
+FTS_SOURCE = """
+    SELECT c.course_number, c.course_number, c.title, c.description,
+           (SELECT group_concat(DISTINCT s.instructor) FROM section s WHERE s.course_number = c.course_number),
+           c.prerequisites
+    FROM course c
+"""
+
+def _refresh_course(number: str) -> str:
+    """Trigger statements that re-index one course."""
+    return f"""
+    DELETE FROM {FTS_TABLE} WHERE rowid = {number};
+    INSERT INTO {FTS_TABLE} (rowid, course_number, title, description, instructor, prerequisites)
+    {FTS_SOURCE} WHERE c.course_number = {number};"""
+
+FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    course_number UNINDEXED,
+    title,
+    description,
+    instructor,
+    prerequisites,
+    tokenize = 'porter unicode61'
+);
+
+-- Keep the index in sync with the course and section tables
+CREATE TRIGGER IF NOT EXISTS course_fts_insert AFTER INSERT ON course BEGIN {_refresh_course("new.course_number")}
+END;
+CREATE TRIGGER IF NOT EXISTS course_fts_update AFTER UPDATE ON course BEGIN {_refresh_course("old.course_number")} {_refresh_course("new.course_number")}
+END;
+CREATE TRIGGER IF NOT EXISTS course_fts_delete AFTER DELETE ON course BEGIN
+    DELETE FROM {FTS_TABLE} WHERE rowid = old.course_number;
+END;
+CREATE TRIGGER IF NOT EXISTS section_fts_insert AFTER INSERT ON section BEGIN {_refresh_course("new.course_number")}
+END;
+CREATE TRIGGER IF NOT EXISTS section_fts_update AFTER UPDATE ON section BEGIN {_refresh_course("old.course_number")} {_refresh_course("new.course_number")}
+END;
+CREATE TRIGGER IF NOT EXISTS section_fts_delete AFTER DELETE ON section BEGIN {_refresh_course("old.course_number")}
+END;
+"""
+
+def rebuild_fts_index(conn: sqlite3.Connection):
+    """Repopulate the full-text index from the catalog."""
+    conn.execute(f"DELETE FROM {FTS_TABLE}")
+    conn.execute(f"""
+        INSERT INTO {FTS_TABLE} (rowid, course_number, title, description, instructor, prerequisites)
+        {FTS_SOURCE}
+    """)
+    conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+def ensure_fts_index(path: str = COURSES_DB, rebuild: bool = False) -> str:
+    """Create the full-text index and its triggers if missing, rebuilding it when out of sync.
+
+    Returns:
+        Path of the database
+    """
+    with sqlite3.connect(path) as conn:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).fetchone()
+        conn.executescript(FTS_SCHEMA)
+        # The catalog may have been rebuilt without the triggers (e.g. a fresh ingest)
+        in_sync = conn.execute(
+            f"SELECT (SELECT COUNT(*) FROM course) = (SELECT COUNT(*) FROM {FTS_TABLE})"
+        ).fetchone()[0]
+        if rebuild or not exists or not in_sync:
+            rebuild_fts_index(conn)
+            print(f"Rebuilt {FTS_TABLE} full-text index.")
+    return path
+
+def to_match_query(query: str, operator: str = "AND") -> str:
+    """Turn free text into an FTS5 query of quoted prefix terms (no FTS syntax errors)."""
+    terms = re.findall(r"\w+", query.lower())
+    return f" {operator} ".join(f'"{term}"*' for term in terms)
+
+def search(query: str, limit: int = 5):
+    """Courses ranked by BM25: (course number, title, snippet)."""
+    path = courses_fts.get()
+    sql = f"""
+        SELECT course_number, title, snippet({FTS_TABLE}, 2, '[', ']', '...', 24)
+        FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?
+        ORDER BY bm25({FTS_TABLE}, {", ".join(map(str, BM25_WEIGHTS))})
+        LIMIT ?
+    """
+    with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+        # All terms first; if nothing matches every term, rank on any term
+        for operator in ("AND", "OR"):
+            match = to_match_query(query, operator)
+            if not match:
+                return []
+            rows = conn.execute(sql, (match, limit)).fetchall()
+            if rows:
+                return rows
+    return []
+
+# Checked (and created if missing) on first use
+courses_fts = LazyResource("courses_fts", ensure_fts_index)
+
+@tool
+def search_courses(query: str, limit: int = 5) -> str:
+    """Use to find courses about a topic (e.g. "machine learning", "security", "databases").
+    Searches course titles, descriptions, instructors and prerequisites and returns the best matching
+    courses, ranked by relevance, with their course number, title and a short description snippet.
+    Use this instead of LIKE queries on "Course Description"."""
+    results = search(query, limit)
+    if not results:
+        return f"No courses found matching '{query}'."
+    return "\n".join(
+        f"{course_code(SUBJECT, number)} - {title}: {snippet}" for number, title, snippet in results
+    )
+
+if __name__ == "__main__":
+    # Offline build step: python -m tools.course_search_tool [--rebuild]
+    parser = argparse.ArgumentParser(description="Create or rebuild the courses full-text index.")
+    parser.add_argument("--db", default=COURSES_DB)
+    parser.add_argument("--rebuild", action="store_true", help="Repopulate the index from the courses table")
+    args = parser.parse_args()
+
+    ensure_fts_index(args.db, rebuild=args.rebuild)
+    print("Course search index is up to date.")
@@ -0,0 +1,138 @@
+import math
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+COURSES_DB = "data/courses.db"
+
+# Queries are interrupted after this many seconds (checked every PROGRESS_STEPS SQLite VM instructions)
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "2"))
+PROGRESS_STEPS = 1000
+
+# LIMIT added to agent queries that don't have one
+MAX_ROWS = int(os.getenv("MAX_QUERY_ROWS", "50"))
+
+# Open the database as immutable (no locking or change detection), only safe if courses.db is never
+# rewritten while the app runs (e.g. a read-only deployment)
+IMMUTABLE = os.getenv("COURSES_DB_IMMUTABLE", "0") == "1"
+
+# Columns holding long text (course descriptions) that shouldn't be returned for every row
+LARGE_TEXT_COLUMNS = {"description", '"description"', '"course description"', "*"}
+
+# String literals, quoted identifiers, words, numbers, and single characters (operators/punctuation)
+SQL_TOKEN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[A-Za-z_][A-Za-z0-9_]*|\d+(?:\.\d+)?|\S")
+
+class QueryRejected(OperationalError):
+    """A query refused before running (reported back to the agent like any SQL error)."""
+
+    def __init__(self, message: str, sql: str):
+        super().__init__(sql, None, sqlite3.OperationalError(message))
+
+class TimedConnection(sqlite3.Connection):
+    """Read-only connection whose statements are interrupted once `deadline` passes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deadline = math.inf
+        self.set_progress_handler(lambda: time.monotonic() > self.deadline, PROGRESS_STEPS)
+
+def connect(path: str = COURSES_DB) -> TimedConnection:
+    flags = "mode=ro&immutable=1" if IMMUTABLE else "mode=ro"
+    return sqlite3.connect(
+        f"file:{os.path.abspath(path)}?{flags}",
+        uri=True,
+        factory=TimedConnection,
+        check_same_thread=False
+    )
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.connection.dbapi_connection.deadline = time.monotonic() + QUERY_TIMEOUT_SECONDS
+
+# Pool of read-only connections shared by every SQLDatabase over courses.db; each query
+# checks out its own connection, so concurrent requests never share one
+POOL_SIZE = int(os.getenv("COURSES_DB_POOL_SIZE", "8"))
+engine = create_engine("sqlite://", creator=connect, poolclass=QueuePool, pool_size=POOL_SIZE, max_overflow=POOL_SIZE)
+event.listen(engine, "before_cursor_execute", _start_timer)
+
+def _tokens(sql: str) -> List[str]:
+    return [token.lower() for token in SQL_TOKEN.findall(sql)]
+
+def _top_level(tokens: List[str]) -> List[str]:
+    """Tokens outside parentheses (i.e. of the outermost statement)."""
+    depth, result = 0, []
+    for token in tokens:
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0:
+            result.append(token)
+    return result
+
+def has_limit(sql: str) -> bool:
+    return "limit" in _top_level(_tokens(sql))
+
+def add_limit(sql: str, max_rows: int = MAX_ROWS) -> str:
+    """Append a LIMIT to a SELECT without one."""
+    tokens = _tokens(sql)
+    if not tokens or tokens[0] not in ("select", "with") or has_limit(sql):
+        return sql
+    return f"{sql.strip().rstrip(';').strip()}\nLIMIT {max_rows}"
+
+def check_query_plan(conn: sqlite3.Connection, sql: str):
+    """Reject full table scans that return large text columns (e.g. every course description) without a LIMIT.
+
+    Raises:
+        QueryRejected: If the query would be rejected
+    """
+    top_level = _top_level(_tokens(sql))
+    if "limit" in top_level or "from" not in top_level:
+        return
+    selected = set(top_level[1:top_level.index("from")])
+    if not selected & LARGE_TEXT_COLUMNS:
+        return
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    scans = [detail for *_, detail in plan if detail.startswith("SCAN") and "INDEX" not in detail]
+    if scans:
+        raise QueryRejected(
+            f"Query rejected: it reads every row ({'; '.join(scans)}) and returns long text columns. "
+            f"Add a WHERE clause or a LIMIT, select fewer columns, or use search_courses to search descriptions.",
+            sql
+        )
+
+class ReadOnlySQLDatabase(SQLDatabase):
+    """SQLDatabase over the shared read-only courses.db connection pool.
+
+    Queries written by the agent (which go through run_no_throw) are plan-checked and get a
+    LIMIT if they have none; every query is interrupted after QUERY_TIMEOUT_SECONDS.
+    """
+
+    db_path = COURSES_DB
+
+    @classmethod
+    def shared(cls, **kwargs: Any) -> "ReadOnlySQLDatabase":
+        return cls(engine, **kwargs)
+
+    def run_no_throw(self, command: str, fetch: str = "all", include_columns: bool = False, *,
+                     parameters: Optional[Dict[str, Any]] = None, execution_options: Optional[Dict[str, Any]] = None):
+        try:
+            with engine.connect() as conn:
+                check_query_plan(conn.connection.dbapi_connection, command)
+        except sqlite3.Error:
+            # Invalid SQL: let the query itself report the error
+            pass
+        except QueryRejected as e:
+            return f"Error: {e.orig}"
+        result = super().run_no_throw(
+            add_limit(command), fetch, include_columns,
+            parameters=parameters, execution_options=execution_options
+        )
+        if isinstance(result, str) and result.startswith("Error: (sqlite3.OperationalError) interrupted"):
+            return f"Error: the query took longer than {QUERY_TIMEOUT_SECONDS:g}s and was stopped. Simplify the query and try again."
+        return result
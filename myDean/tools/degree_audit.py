@@ -0,0 +1,210 @@
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from tools.degree_requirements import ProgramRequirements, completed_courses, degree_requirements
+
+# Students per process pool task
+CHUNK_SIZE = 2000
+
+AUDIT_FIELDS = [
+    "user_id", "program", "kind", "declared",
+    "required_completed", "required_total", "math_completed", "math_total",
+    "electives_completed", "electives_required", "additional_completed", "additional_total",
+    "requirements_completed", "requirements_total", "progress", "complete", "missing_required"
+]
+
+class BitsetProgram:
+    """A program's requirements as bitmasks over a course index, so auditing a student is a few ANDs and popcounts.
+
+    Counts the same requirements as calculate_program_progress (the degree progress panel).
+    """
+
+    def __init__(self, program: ProgramRequirements, index: Dict[str, int]):
+        def mask(courses: Iterable[str]) -> int:
+            return sum(1 << index[c] for c in set(courses) if c in index)
+
+        self.name = program.name
+        self.kind = program.kind
+        self.required = [(1 << index[c], c) for c in program.required_courses if c in index]
+        self.required_mask = mask(program.required_courses)
+        self.required_total = len(program.required_courses)
+        self.math_required_mask = mask(program.math_required)
+        self.math_elective_mask = mask(program.valid_math_electives)
+        self.math_elective_slots = program.math_elective_slots
+        self.math_total = len(program.math_requirements)
+        self.electives = None
+        if program.electives:
+            req = program.electives
+            self.electives = (mask(c for c in index if c not in req.exclude and req.pattern.match(c)), req.required_count)
+        self.additional = [
+            (mask(c for c in index if c not in req.exclude and req.pattern.match(c)), req.required_count)
+            for req in program.additional
+        ]
+        self.requirements_total = self.required_total + self.math_total + bool(self.electives) + len(self.additional)
+
+    def audit(self, courses: int) -> Dict[str, Any]:
+        """Progress of a student whose completed courses are the bitset `courses`."""
+        required = (courses & self.required_mask).bit_count()
+        math = (courses & self.math_required_mask).bit_count() + min(
+            (courses & self.math_elective_mask).bit_count(), self.math_elective_slots
+        )
+        electives, electives_required, electives_met = 0, 0, 0
+        if self.electives:
+            electives_mask, electives_required = self.electives
+            electives = (courses & electives_mask).bit_count()
+            electives_met = electives >= electives_required
+        additional = sum((courses & m).bit_count() >= count for m, count in self.additional)
+        completed = required + math + electives_met + additional
+        return {
+            "program": self.name,
+            "kind": self.kind,
+            "required_completed": required,
+            "required_total": self.required_total,
+            "math_completed": math,
+            "math_total": self.math_total,
+            "electives_completed": electives,
+            "electives_required": electives_required,
+            "additional_completed": additional,
+            "additional_total": len(self.additional),
+            "requirements_completed": completed,
+            "requirements_total": self.requirements_total,
+            "progress": round(completed / self.requirements_total * 100, 1) if self.requirements_total else 0,
+            "complete": completed == self.requirements_total,
+            "missing_required": " ".join(c for bit, c in self.required if not courses & bit)
+        }
+
+# Set in each pool worker by _init_worker
+_programs: Dict[str, BitsetProgram] = {}
+_index: Dict[str, int] = {}
+
+def _init_worker(programs: Dict[str, BitsetProgram], index: Dict[str, int]):
+    global _programs, _index
+    _programs, _index = programs, index
+
+def _audit_chunk(students: List[Tuple[str, List[str], List[str]]], all_programs: bool) -> List[Dict[str, Any]]:
+    rows = []
+    for user_id, courses, declared in students:
+        bits = sum(1 << _index[c] for c in courses)
+        names = _programs if all_programs else [name for name in declared if name in _programs]
+        for name in names:
+            rows.append({"user_id": user_id, **_programs[name].audit(bits), "declared": name in declared})
+    return rows
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def audit(profiles: Iterable[Tuple[str, Dict[str, Any]]], all_programs: bool = False,
+          workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Audit many students at once.
+
+    Args:
+        profiles: (user_id, profile) pairs
+        all_programs: Audit every program in degree_requirements.json, not only the declared majors/minors
+        workers: Worker processes (default: one per CPU, 1 audits in this process)
+        chunk_size: Students per worker task
+
+    Yields:
+        One row (see AUDIT_FIELDS) per student and program, in input order
+    """
+    students = [
+        (user_id, completed_courses(profile.get("courses_completed")),
+         [name for name in (profile.get("majors") or []) + (profile.get("minors") or []) if name])
+        for user_id, profile in profiles
+    ]
+
+    # Index every course any student or requirement mentions, so patterns are matched once per course
+    degree_requirements.data()
+    programs = degree_requirements.programs
+    codes = {c for _, courses, _ in students for c in courses}
+    for program in programs.values():
+        codes |= program.required_set | program.math_required | program.valid_math_electives
+    index = {code: bit for bit, code in enumerate(sorted(codes))}
+    compiled = {name: BitsetProgram(program, index) for name, program in programs.items()}
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(students) <= chunk_size:
+        _init_worker(compiled, index)
+        for chunk in _chunks(students, chunk_size):
+            yield from _audit_chunk(chunk, all_programs)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(compiled, index)) as pool:
+        chunks = list(_chunks(students, chunk_size))
+        for rows in pool.map(_audit_chunk, chunks, [all_programs] * len(chunks)):
+            yield from rows
+
+def load_profiles(profiles_dir: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(user_id, profile) pairs from the user store, or from <profiles_dir>/<user>.json files."""
+    if profiles_dir is None:
+        from tools.user_store import PROFILE, user_store
+        yield from user_store().all(PROFILE)
+        return
+    for path in sorted(glob.glob(os.path.join(profiles_dir, "*.json"))):
+        with open(path, "r") as f:
+            yield os.path.splitext(os.path.basename(path))[0], json.load(f)
+
+def format_rows(rows: Iterable[Dict[str, Any]], fmt: str = "csv") -> Iterator[str]:
+    """Rows as CSV (with a header) or JSON Lines, one line at a time for streaming."""
+    if fmt == "jsonl":
+        for row in rows:
+            yield json.dumps({field: row[field] for field in AUDIT_FIELDS}) + "\n"
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, AUDIT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def benchmark(students: int = 20000, workers: Optional[int] = None, seed: int = 0):
+    """Audit `students` random profiles against every program."""
+    raw = degree_requirements.data()
+    programs = degree_requirements.programs.values()
+    pool = sorted({c for p in programs for c in p.required_set | p.math_required | p.valid_math_electives})
+    pool += [f"COSC-{n}" for n in range(2000, 5000, 13)] + [f"PHIL-{n}" for n in range(1000, 4000, 250)]
+    rng = random.Random(seed)
+    profiles = [(f"student{i}", {
+        "courses_completed": rng.sample(pool, rng.randint(0, 30)),
+        "majors": [rng.choice(list(raw["majors"]))],
+        "minors": [rng.choice(list(raw["minors"]))] if rng.random() < 0.5 else []
+    }) for i in range(students)]
+
+    begin = time.perf_counter()
+    rows = sum(1 for _ in audit(profiles, all_programs=True, workers=workers))
+    elapsed = time.perf_counter() - begin
+    print(f"{students} students, {rows} program audits in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    # python -m tools.degree_audit --format csv > audit.csv
+    parser = argparse.ArgumentParser(description="Degree progress of every student.")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--profiles-dir", help="Audit <dir>/<user>.json profiles instead of the user store")
+    parser.add_argument("--all-programs", action="store_true", help="Audit every program, not only declared ones")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--output", help="Write to this file instead of stdout")
+    parser.add_argument("--benchmark", type=int, metavar="STUDENTS", help="Time an audit of random students")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.workers)
+    else:
+        out = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            rows = audit(load_profiles(args.profiles_dir), all_programs=args.all_programs, workers=args.workers)
+            for line in format_rows(rows, args.format):
+                out.write(line)
+        finally:
+            if out is not sys.stdout:
+                out.close()
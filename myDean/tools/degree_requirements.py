@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+REQUIREMENTS_FILE = "data/degree_requirements.json"
+
+# Placeholder keys in "math_requirements" (e.g. "MATH-ELECTIVE1") standing for any course in "valid_math_electives"
+MATH_ELECTIVE = "ELECTIVE"
+
+def normalize_course_code(course_code: str) -> str:
+    """Normalize course code format to use dashes (e.g., 'COSC 2010' -> 'COSC-2010')"""
+    return course_code.strip().replace(" ", "-")
+
+def compile_patterns(patterns: List[str]) -> re.Pattern:
+    """One regex matching (at the start of a course code, like re.match) any of the patterns."""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+class CountRequirement:
+    """A number of courses matching a set of patterns (program electives, CSES/TES requirements)."""
+
+    def __init__(self, name: str, spec: Dict[str, Any], exclude: Iterable[str] = ()):
+        self.name = name
+        self.pattern = compile_patterns(spec["valid_patterns"])
+        self.required_count = spec["required_count"]
+        self.description = spec["description"]
+        self.exclude = frozenset(exclude)
+
+    def matching(self, courses: List[str]) -> List[str]:
+        return [c for c in courses if c not in self.exclude and self.pattern.match(c)]
+
+class ProgramRequirements:
+    """Requirements of one major or minor, with course sets and patterns precomputed."""
+
+    def __init__(self, name: str, kind: str, spec: Dict[str, Any], valid_math_electives: Iterable[str]):
+        self.name = name
+        self.kind = kind
+        self.spec = spec
+        self.required_courses: Dict[str, str] = spec.get("required_courses", {})
+        self.required_set = frozenset(self.required_courses)
+        self.math_requirements: Dict[str, str] = spec.get("math_requirements", {})
+        self.math_required = frozenset(c for c in self.math_requirements if MATH_ELECTIVE not in c)
+        self.math_elective_slots = sum(1 for c in self.math_requirements if MATH_ELECTIVE in c)
+        # Only programs with elective slots count math electives
+        self.valid_math_electives = frozenset(valid_math_electives) - self.math_required if self.math_elective_slots else frozenset()
+        self.electives = None
+        if "electives" in spec:
+            exclude = self.required_set | self.math_required if spec["electives"].get("exclude_required") else ()
+            self.electives = CountRequirement("electives", spec["electives"], exclude)
+        self.additional = [
+            CountRequirement(name, details, ())
+            for name, details in spec.get("additional_requirements", {}).items()
+        ]
+        self._buckets: Dict[str, Tuple[str, ...]] = {}
+
+    def buckets_of(self, course: str) -> Tuple[str, ...]:
+        """Requirements a (normalized) course counts towards: "required", "math_required", "math_electives",
+        "electives" and the names of additional requirements (memoized per course)."""
+        buckets = self._buckets.get(course)
+        if buckets is None:
+            buckets = tuple(
+                name for name, counts in (
+                    ("required", course in self.required_set),
+                    ("math_required", course in self.math_required),
+                    ("math_electives", course in self.valid_math_electives),
+                    ("electives", bool(self.electives and self.electives.matching([course])))
+                ) if counts
+            ) + tuple(req.name for req in self.additional if req.matching([course]))
+            self._buckets[course] = buckets
+        return buckets
+
+    def evaluate(self, completed: List[str]) -> Dict[str, Any]:
+        """Which of the (normalized, de-duplicated) completed courses satisfy each requirement.
+
+        Returns:
+            Courses in completion order: "required", "math_required", "math_electives" (at most one
+            per elective slot), "electives" (every matching course, not capped) and "additional"
+            (per additional requirement)
+        """
+        return {
+            "required": [c for c in completed if c in self.required_set],
+            "math_required": [c for c in completed if c in self.math_required],
+            "math_electives": [c for c in completed if c in self.valid_math_electives][:self.math_elective_slots],
+            "electives": self.electives.matching(completed) if self.electives else [],
+            "additional": {req.name: req.matching(completed) for req in self.additional}
+        }
+
+class DegreeRequirements:
+    """Compiled copy of degree_requirements.json shared by the progress page and the agent tools.
+
+    Loaded on first use and reloaded when the file changes on disk (checked by mtime).
+    """
+
+    def __init__(self, path: str = REQUIREMENTS_FILE):
+        self.path = path
+        self.mtime = None
+        self.raw: Dict[str, Any] = {}
+        self.programs: Dict[str, ProgramRequirements] = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.mtime:
+            return
+        with self._lock:
+            if mtime == self.mtime:
+                return
+            with open(self.path, "r") as f:
+                raw = json.load(f)
+            valid_math_electives = raw.get("valid_math_electives", {}).keys()
+            programs = {
+                name: ProgramRequirements(name, kind, spec, valid_math_electives)
+                for kind, group in (("major", raw["majors"]), ("minor", raw["minors"]))
+                for name, spec in group.items()
+            }
+            self.raw, self.programs = raw, programs
+            self.mtime = mtime
+
+    def data(self) -> Dict[str, Any]:
+        """The requirements as they are in the JSON file (don't modify)."""
+        self._refresh()
+        return self.raw
+
+    def program(self, name: str) -> Optional[ProgramRequirements]:
+        self._refresh()
+        return self.programs.get(name)
+
+    def evaluate(self, name: str, courses_completed: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Progress of a list of completed courses (any format) towards a program, None for unknown programs."""
+        program = self.program(name)
+        return program.evaluate(completed_courses(courses_completed)) if program else None
+
+def completed_courses(courses_completed: Iterable[str]) -> List[str]:
+    """Normalized completed courses without duplicates, in their original order."""
+    return list(dict.fromkeys(normalize_course_code(c) for c in courses_completed or []))
+
+degree_requirements = DegreeRequirements()
+
+def calculate_program_progress(program: ProgramRequirements, completed: List[str]) -> Dict[str, Any]:
+    """Per-requirement checklist of a program (as shown by the degree progress panel)."""
+    evaluation = program.evaluate(completed)
+    requirements = []
+
+    # Required courses
+    completed_required = set(evaluation["required"])
+    for course, desc in program.required_courses.items():
+        requirements.append({"title": desc, "details": course, "completed": course in completed_required})
+
+    # Math requirements, each elective slot is filled by a different approved math elective
+    completed_math = set(evaluation["math_required"])
+    math_electives = iter(evaluation["math_electives"])
+    for course, desc in program.math_requirements.items():
+        if MATH_ELECTIVE in course:
+            done = next(math_electives, None) is not None
+            details = "Any math elective from approved list"
+        else:
+            done = course in completed_math
+            details = course
+        requirements.append({"title": desc, "details": details, "completed": done})
+
+    # Electives
+    if program.electives:
+        count, required = len(evaluation["electives"]), program.electives.required_count
+        requirements.append({
+            "title": "Program Electives",
+            "details": f"{count}/{required} {program.electives.description}",
+            "completed": count >= required
+        })
+
+    # Additional requirements (for CSES and TES concentration)
+    for req in program.additional:
+        count = len(evaluation["additional"][req.name])
+        requirements.append({
+            "title": req.name.replace("_", " ").title(),
+            "details": f"{count}/{req.required_count} {req.description}",
+            "completed": count >= req.required_count
+        })
+
+    completed_count = sum(1 for req in requirements if req["completed"])
+    return {
+        "name": program.name,
+        "requirements": requirements,
+        "progress": (completed_count / len(requirements) * 100) if requirements else 0
+    }
+
+def calculate_progress(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Progress of a profile towards its (first) major and minor, for /api/degree-progress."""
+    completed = completed_courses(profile.get("courses_completed", []))
+    result = {}
+    for kind, names in (("major", profile.get("majors") or []), ("minor", profile.get("minors") or [])):
+        name = names[0] if names else None
+        program = degree_requirements.program(name) if name else None
+        if program:
+            result[kind] = calculate_program_progress(program, completed)
+        else:
+            result[kind] = {"name": name, "requirements": [], "progress": 0}
+
+    # Calculate overall progress only from programs that exist
+    requirements = result["major"]["requirements"] + result["minor"]["requirements"]
+    if requirements:
+        result["overall_progress"] = sum(1 for req in requirements if req["completed"]) / len(requirements) * 100
+    else:
+        result["overall_progress"] = 0
+    return result
+
+def benchmark(profiles: int = 2000, seed: int = 0):
+    """Time progress of random profiles through both the progress page and the agent tool code paths."""
+    from tools.requirements_tool import check_major_progress, check_minor_progress
+
+    raw = degree_requirements.data()
+    programs = degree_requirements.programs
+    pool = sorted({c for p in programs.values() for c in p.required_set | p.math_required})
+    pool += list(raw["valid_math_electives"]) + [f"COSC-{n}" for n in range(2000, 5000, 37)] + ["PHIL-1010", "GOVT-2000", "LAW-3000"]
+    rng = random.Random(seed)
+    samples = [{
+        "courses_completed": [c.replace("-", " ") for c in rng.sample(pool, rng.randint(0, 25))],
+        "majors": [rng.choice(list(raw["majors"]))],
+        "minors": [rng.choice(list(raw["minors"]))] if rng.random() < 0.5 else []
+    } for _ in range(profiles)]
+
+    begin = time.perf_counter()
+    for profile in samples:
+        calculate_progress(profile)
+    page = (time.perf_counter() - begin) / profiles * 1e6
+
+    begin = time.perf_counter()
+    for profile in samples:
+        courses = completed_courses(profile["courses_completed"])
+        for name in profile["majors"]:
+            check_major_progress(degree_requirements.program(name), courses)
+        for name in profile["minors"]:
+            check_minor_progress(degree_requirements.program(name), courses)
+    tool = (time.perf_counter() - begin) / profiles * 1e6
+    print(f"{profiles} profiles: /api/degree-progress {page:.1f} us/profile, check_requirements_progress {tool:.1f} us/profile")
+
+if __name__ == "__main__":
+    # python -m tools.degree_requirements --benchmark
+    parser = argparse.ArgumentParser(description="Degree requirements engine.")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--profiles", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.profiles)
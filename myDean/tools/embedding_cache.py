@@ -0,0 +1,97 @@
+import glob
+import hashlib
+import json
+import os
+import uuid
+from typing import Dict, List, Tuple
+import numpy as np
+
+def content_hash(texts: List[str]) -> str:
+    """Stable hash of a list of texts (order-sensitive)."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+class EmbeddingCache:
+    """On-disk cache of text embeddings so only new texts hit the embeddings API.
+
+    Stored as a float32 matrix (<prefix>.<build>.npy, memory-mapped on load) plus a JSON file
+    (<prefix>.json) with the text and content hash of each row, the embedding model that produced
+    them and the name of the matrix file. Rows are looked up by content hash, so a changed text
+    is re-embedded.
+
+    Matrix files are never overwritten: a save writes a new build, then swaps the JSON file in
+    with a single rename, so readers always get a matrix and metadata from the same build.
+    """
+
+    def __init__(self, path_prefix: str, embeddings):
+        self.path_prefix = path_prefix
+        self.meta_path = f"{path_prefix}.json"
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+
+    def _load(self) -> Tuple[Dict[str, int], np.ndarray]:
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model:
+                return {}, None
+            matrix = np.load(os.path.join(os.path.dirname(self.meta_path), meta["matrix"]), mmap_mode="r")
+        except (FileNotFoundError, KeyError, ValueError):
+            return {}, None
+        rows = {text_hash: i for i, text_hash in enumerate(meta["hashes"])}
+        return rows, matrix
+
+    def _save(self, texts: List[str], matrix: np.ndarray):
+        os.makedirs(os.path.dirname(self.meta_path) or ".", exist_ok=True)
+        try:
+            with open(self.meta_path, "r") as f:
+                previous = json.load(f).get("matrix")
+        except (FileNotFoundError, ValueError):
+            previous = None
+
+        matrix_path = f"{self.path_prefix}.{uuid.uuid4().hex[:12]}.npy"
+        with open(matrix_path, "wb") as f:
+            np.save(f, matrix)
+        with open(f"{self.meta_path}.tmp", "w") as f:
+            json.dump({
+                "model": self.model,
+                "matrix": os.path.basename(matrix_path),
+                "hashes": [text_hash(text) for text in texts],
+                "texts": texts
+            }, f)
+        # The metadata names its matrix, so this one rename switches both at once
+        os.replace(f"{self.meta_path}.tmp", self.meta_path)
+
+        # Drop older builds, keeping the previous one for workers that have just read its metadata
+        keep = {os.path.basename(matrix_path), previous}
+        for path in glob.glob(f"{glob.escape(self.path_prefix)}.*.npy"):
+            if os.path.basename(path) not in keep:
+                os.remove(path)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Return a float32 matrix with one embedding row per text, embedding only uncached texts."""
+        rows, matrix = self._load()
+        hashes = [text_hash(text) for text in texts]
+        missing = {h: text for h, text in zip(hashes, texts) if h not in rows}
+
+        if not missing:
+            if matrix is None:
+                return np.zeros((0, 0), dtype=np.float32)
+            return np.asarray(matrix[[rows[h] for h in hashes]], dtype=np.float32)
+
+        print(f"Embedding {len(missing)} new texts ({len(set(hashes)) - len(missing)} cached)")
+        new_vectors = np.asarray(self.embeddings.embed_documents(list(missing.values())), dtype=np.float32)
+        for h in missing:
+            rows[h] = len(rows)
+        matrix = new_vectors if matrix is None else np.vstack([matrix, new_vectors])
+
+        # Only keep rows that are still in use
+        unique = dict(zip(hashes, texts))
+        self._save(list(unique.values()), np.ascontiguousarray(matrix[[rows[h] for h in unique]]))
+        return np.ascontiguousarray(matrix[[rows[h] for h in hashes]], dtype=np.float32)
@@ -0,0 +1,259 @@
+import itertools
+import math
+import threading
+from typing import Annotated, Any, Dict, FrozenSet, List, Optional, Set, Tuple
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+from tools.degree_requirements import MATH_ELECTIVE, ProgramRequirements, completed_courses, degree_requirements
+from tools.prerequisite_tool import PrerequisiteGraph, prerequisite_graph
+from tools.requirements_tool import normalize_program_name
+from tools.user_store import PROFILE, user_store
+
+# Default and largest per-semester course caps
+MAX_COURSES_PER_SEMESTER = 4
+MAX_CAP = 8
+
+# Course combinations tried per search state once the bound can't be met (the first is usually optimal)
+MAX_BRANCHES = 64
+
+# Memoized search states kept across plans (per prerequisite graph and cap), cleared when full
+MEMO_SIZE = 50_000
+
+def graph_code(code: str) -> str:
+    """Requirement code ("COSC-2010") in prerequisite graph form ("COSC 2010")."""
+    return code.replace("-", " ")
+
+def requirement_code(code: str) -> str:
+    return code.replace(" ", "-")
+
+class PlanTargets:
+    """The courses left to take for a set of programs, chosen on top of the completed courses.
+
+    Required and required math courses are taken as they are. Open requirements (math electives,
+    program electives, additional requirements) are filled with catalog courses needing the fewest
+    extra prerequisites, and with placeholders ("Any ...") when the catalog has no candidate.
+    Missing prerequisites of every chosen course are added too.
+    """
+
+    def __init__(self, graph: PrerequisiteGraph, completed: List[str]):
+        self.graph = graph
+        self.completed = set(completed)
+        self.courses: Dict[str, Set[str]] = {}  # course -> requirements it is taken for
+        self.placeholders: Dict[str, str] = {}  # placeholder -> description
+
+    def taken(self) -> Set[str]:
+        return self.completed | set(self.courses)
+
+    def add(self, course: str, reason: str):
+        if course in self.completed:
+            return
+        self.courses.setdefault(course, set()).add(reason)
+        # Close over prerequisites (the option missing the fewest courses)
+        code = graph_code(course)
+        if self.graph.options.get(code):
+            for missing in self.graph.missing(code, map(graph_code, self.taken())):
+                self.add(requirement_code(missing), f"prerequisite of {course}")
+
+    def extra_prerequisites(self, course: str) -> int:
+        code = graph_code(course)
+        if not self.graph.options.get(code):
+            return 0
+        return len(self.graph.missing(code, map(graph_code, self.taken())))
+
+    def add_program(self, program: ProgramRequirements):
+        name = program.name
+        for course in program.required_courses:
+            self.add(course, f"{name}: required")
+        for course in program.math_required:
+            self.add(course, f"{name}: math requirement")
+
+        # Math electives last, so prerequisites added for electives (e.g. MATH-2250) fill math elective slots first
+        slots = []
+        if program.electives:
+            req = program.electives
+            candidates = [requirement_code(c) for c in self.graph.order if req.matching([requirement_code(c)])]
+            slots.append(("elective", req.matching, req.required_count, candidates, req.description))
+        for req in program.additional:
+            candidates = [requirement_code(c) for c in self.graph.order if req.matching([requirement_code(c)])]
+            slots.append((req.name.replace("_", " "), req.matching, req.required_count, candidates, req.description))
+        slots.append((
+            "math elective", lambda courses: [c for c in courses if c in program.valid_math_electives],
+            program.math_elective_slots, sorted(program.valid_math_electives), "Additional Math Elective"
+        ))
+
+        for label, matching, required, candidates, description in slots:
+            # Re-counted after every course, since the prerequisites it adds may fill the slot too
+            while (needed := required - len(matching(sorted(self.taken())))) > 0:
+                available = [c for c in candidates if c not in self.taken()]
+                if available:
+                    course = min(available, key=lambda c: (self.extra_prerequisites(c), c))
+                    self.add(course, f"{name}: {label}")
+                    continue
+                for i in range(required - needed, required):
+                    placeholder = f"Any: {description} ({label} {i + 1} of {required})"
+                    self.placeholders[placeholder] = f"{name}: {label}"
+                    self.courses.setdefault(placeholder, set()).add(f"{name}: {label}")
+                break
+            # Courses added for something else (e.g. as a prerequisite) that count towards this requirement
+            for course in matching(sorted(c for c in self.courses if c not in self.placeholders))[:required]:
+                self.courses[course].add(f"{name}: {label}")
+
+class Scheduler:
+    """Heuristic short ordering of courses into semesters under prerequisites and a per-semester cap.
+
+    Search over the set of courses still to take, memoized by (courses left, courses done): a plan
+    for a student who has since completed some of the planned courses reuses the earlier search.
+    Semesters take the courses with the longest remaining prerequisite chains first (optimal for
+    tree-shaped prerequisites); other combinations are only tried when that misses the lower bound,
+    and at most MAX_BRANCHES of them per state, so the fewest semesters isn't guaranteed in general.
+    """
+
+    def __init__(self, graph: PrerequisiteGraph, cap: int):
+        self.graph = graph
+        self.cap = cap
+        self.memo: Dict[Tuple[FrozenSet[str], int], Optional[List[List[str]]]] = {}
+        self.lock = threading.Lock()
+
+    def _done_mask(self, done: Set[str]) -> int:
+        return self.graph.mask(graph_code(c) for c in done)
+
+    def _eligible(self, course: str, done: int) -> bool:
+        code = graph_code(course)
+        return code not in self.graph.option_masks or self.graph.is_eligible(code, done)
+
+    def _levels(self, remaining: FrozenSet[str]) -> Dict[str, int]:
+        """Length of the longest chain of remaining courses that depend on each course (itself included)."""
+        levels: Dict[str, int] = {}
+        unlocks = {c: [requirement_code(u) for u in self.graph.unlocks.get(graph_code(c), [])] for c in remaining}
+
+        def level(course):
+            if course not in levels:
+                levels[course] = 1 + max((level(u) for u in unlocks[course] if u in remaining), default=0)
+            return levels[course]
+
+        for course in remaining:
+            level(course)
+        return levels
+
+    def solve(self, remaining: FrozenSet[str], done: Set[str]) -> Optional[List[List[str]]]:
+        with self.lock:
+            if len(self.memo) > MEMO_SIZE:
+                self.memo.clear()
+            return self._solve(remaining, self._done_mask(done))
+
+    def _solve(self, remaining: FrozenSet[str], done: int) -> Optional[List[List[str]]]:
+        if not remaining:
+            return []
+        key = (remaining, done)
+        if key in self.memo:
+            return self.memo[key]
+
+        available = [c for c in remaining if self._eligible(c, done)]
+        if not available:
+            self.memo[key] = None
+            return None
+        levels = self._levels(remaining)
+        available.sort(key=lambda c: (-levels[c], c))
+        bound = max(math.ceil(len(remaining) / self.cap), max(levels.values()))
+
+        best = None
+        if len(available) <= self.cap:
+            choices = [tuple(available)]
+        else:
+            choices = itertools.islice(itertools.combinations(available, self.cap), MAX_BRANCHES)
+        for choice in choices:
+            rest = self._solve(remaining - set(choice), done | self.graph.mask(graph_code(c) for c in choice))
+            if rest is not None and (best is None or len(rest) + 1 < len(best)):
+                best = [sorted(choice)] + rest
+                if len(best) <= bound:
+                    break
+        self.memo[key] = best
+        return best
+
+# Schedulers of the current prerequisite graph by cap (all dropped when the catalog is reloaded)
+_schedulers: Dict[int, Scheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def scheduler(graph: PrerequisiteGraph, cap: int) -> Scheduler:
+    """Shared scheduler (and its memo) per cap for the current prerequisite graph."""
+    with _schedulers_lock:
+        if any(s.graph is not graph for s in _schedulers.values()):
+            _schedulers.clear()
+        if cap not in _schedulers:
+            _schedulers[cap] = Scheduler(graph, cap)
+        return _schedulers[cap]
+
+def plan_for_profile(profile: Dict[str, Any], max_courses_per_semester: int = MAX_COURSES_PER_SEMESTER,
+                     program: str = None) -> Dict[str, Any]:
+    """Semester-by-semester plan covering the remaining requirements of a profile's programs (or one program)."""
+    if not 1 <= max_courses_per_semester <= MAX_CAP:
+        return {"error": f"max_courses_per_semester must be between 1 and {MAX_CAP}"}
+    if program:
+        names = [normalize_program_name(program) or program]
+    else:
+        names = [n for n in (profile.get("majors") or []) + (profile.get("minors") or []) if n]
+    programs = [p for n in names if (p := degree_requirements.program(n))]
+    if not programs:
+        return {"error": f"Program '{names[0]}' not found in requirements" if names else "No major or minor declared"}
+
+    graph = prerequisite_graph()
+    completed = completed_courses(profile.get("courses_completed"))
+    targets = PlanTargets(graph, completed)
+    for p in programs:
+        targets.add_program(p)
+
+    semesters = scheduler(graph, max_courses_per_semester).solve(frozenset(targets.courses), set(completed))
+    if semesters is None:
+        return {"error": "No plan satisfies the prerequisites"}
+
+    raw = degree_requirements.data()
+    titles = {**raw.get("valid_math_electives", {})}
+    for p in programs:
+        titles.update(p.required_courses)
+        titles.update((c, t) for c, t in p.math_requirements.items() if MATH_ELECTIVE not in c)
+
+    def describe(course):
+        title = graph.titles.get(graph_code(course)) or titles.get(course)
+        entry = {"course": course, "for": sorted(targets.courses[course])}
+        if title:
+            entry["title"] = title
+        if course not in targets.placeholders and graph_code(course) not in graph.option_masks:
+            entry["note"] = "not in the current catalog, prerequisites not checked"
+        return entry
+
+    return {
+        "programs": [p.name for p in programs],
+        "max_courses_per_semester": max_courses_per_semester,
+        "total_semesters": len(semesters),
+        "courses_remaining": len(targets.courses),
+        "semesters": [
+            {"semester": i + 1, "courses": [describe(c) for c in courses]}
+            for i, courses in enumerate(semesters)
+        ]
+    }
+
+@tool
+def plan_graduation(
+    config: Annotated[RunnableConfig, "InjectedToolArg"],
+    max_courses_per_semester: int = MAX_COURSES_PER_SEMESTER,
+    program: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Plan semesters to finish the user's declared majors/minors (or one program) quickly, respecting prerequisites.
+
+    The plan is heuristic: it aims for the fewest semesters but doesn't guarantee it.
+
+    Args:
+        config: The config object containing user_id
+        max_courses_per_semester: Most requirement courses to plan in one semester (default 4)
+        program: Optional. Only plan this program. Can use common variations (e.g., "CS Minor", "AB", etc.)
+
+    Returns:
+        The semesters with their courses and the requirement(s) each course is for. Open requirements
+        are filled with catalog courses needing the fewest extra prerequisites, or "Any: ..." placeholders.
+    """
+    user_id = config["configurable"].get("user_id", "default_user")
+    profile = user_store().get(PROFILE, user_id)
+    if profile is None:
+        return {"error": "Profile not found"}
+    return plan_for_profile(profile, max_courses_per_semester, program)
@@ -0,0 +1,141 @@
+import threading
+from typing import Annotated, Any, Dict, Iterable, List, Optional
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+from tools.catalog import COURSE_CODE, SUBJECT, catalog, course_code
+from tools.profile_tool import load_profile
+
+class PrerequisiteGraph:
+    """Prerequisite DAG of the catalog, compiled to bitsets.
+
+    Every course code (catalog courses and outside prerequisites such as MATH 2800) gets a bit.
+    A course's prerequisites are a list of option masks; it can be taken when the completed
+    courses cover every bit of any one option, so eligibility is a few integer operations per course.
+    """
+
+    def __init__(self, courses: Dict[int, Dict]):
+        self.titles = {course_code(SUBJECT, n): course["title"] for n, course in courses.items()}
+        self.options = options = {
+            course_code(SUBJECT, n): course["prerequisite_options"] for n, course in courses.items()
+        }
+        codes = sorted(set(options) | {code for opts in options.values() for option in opts for code in option})
+        self.bit = {code: 1 << i for i, code in enumerate(codes)}
+        self.option_masks = {
+            code: [self.mask(option) for option in opts] for code, opts in options.items()
+        }
+        # Edges: course -> every course that appears in one of its options (and the reverse)
+        self.requires = {code: sorted({c for option in opts for c in option}) for code, opts in options.items()}
+        self.unlocks: Dict[str, List[str]] = {code: [] for code in codes}
+        for code, required in self.requires.items():
+            for prerequisite in required:
+                self.unlocks[prerequisite].append(code)
+        self.order = self._topological_order()
+
+    def mask(self, codes: Iterable[str]) -> int:
+        """Bitset of course codes (codes outside the graph are ignored)."""
+        result = 0
+        for code in codes:
+            result |= self.bit.get(code, 0)
+        return result
+
+    def _topological_order(self) -> List[str]:
+        """Catalog courses ordered so that prerequisites come first (raises on a cycle)."""
+        order, state = [], {}
+
+        def visit(code, path):
+            if state.get(code) == "done":
+                return
+            if state.get(code) == "visiting":
+                raise ValueError(f"Prerequisite cycle: {' -> '.join(path + [code])}")
+            state[code] = "visiting"
+            for prerequisite in self.requires.get(code, []):
+                visit(prerequisite, path + [code])
+            state[code] = "done"
+            if code in self.option_masks:
+                order.append(code)
+
+        for code in sorted(self.option_masks):
+            visit(code, [])
+        return order
+
+    def is_eligible(self, code: str, completed: int) -> bool:
+        masks = self.option_masks.get(code)
+        return masks is not None and (not masks or any(mask & ~completed == 0 for mask in masks))
+
+    def missing(self, code: str, completed_codes: Iterable[str]) -> List[str]:
+        """Courses still needed for the option closest to completion."""
+        completed_codes = set(completed_codes)
+        if not self.options.get(code):
+            return []
+        return min(
+            (sorted(set(option) - completed_codes) for option in self.options[code]),
+            key=lambda missing: (len(missing), missing)
+        )
+
+    def eligible(self, completed_codes: Iterable[str]) -> List[str]:
+        """Catalog courses (not yet completed) whose prerequisites are met, in prerequisite order."""
+        completed = self.mask(completed_codes)
+        return [
+            code for code in self.order
+            if not completed & self.bit[code] and self.is_eligible(code, completed)
+        ]
+
+_graph: Optional[PrerequisiteGraph] = None
+_graph_version = None
+_graph_lock = threading.Lock()
+
+def prerequisite_graph() -> PrerequisiteGraph:
+    """The compiled graph, rebuilt when the catalog is reloaded."""
+    global _graph, _graph_version
+    courses = catalog.all_courses()
+    if _graph is None or _graph_version is not courses:
+        with _graph_lock:
+            if _graph is None or _graph_version is not courses:
+                _graph, _graph_version = PrerequisiteGraph(courses), courses
+    return _graph
+
+def normalize_code(code: str) -> str:
+    """Course code in catalog form: "cosc-2010", "COSC2010" or "2010" -> "COSC 2010"."""
+    match = COURSE_CODE.fullmatch(str(code))
+    if not match:
+        return str(code).strip().upper()
+    return course_code(match.group(1) or SUBJECT, match.group(2))
+
+@tool
+def check_eligibility(
+    config: Annotated[RunnableConfig, "InjectedToolArg"],
+    course_numbers: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Check which courses the student can take, based on the prerequisites and the courses_completed in their profile.
+
+    Args:
+        config: The config object containing user_id
+        course_numbers: Optional. Only check these courses (e.g. ["COSC 3020", "3200"]). If omitted,
+            returns every course in the catalog the student is eligible for (and what's missing for the rest).
+    """
+    user_id = config["configurable"].get("user_id", "default_user")
+    completed = [normalize_code(c) for c in load_profile(user_id).get("courses_completed") or []]
+    graph = prerequisite_graph()
+    completed_mask = graph.mask(completed)
+
+    if course_numbers:
+        codes = [normalize_code(c) for c in course_numbers]
+    else:
+        codes = graph.order
+
+    eligible, not_eligible, unknown = [], [], []
+    for code in codes:
+        if code not in graph.option_masks:
+            unknown.append(code)
+        elif completed_mask & graph.bit[code] and not course_numbers:
+            continue
+        elif graph.is_eligible(code, completed_mask):
+            eligible.append({"course": code, "title": graph.titles[code], "completed": bool(completed_mask & graph.bit[code])})
+        else:
+            not_eligible.append({"course": code, "title": graph.titles[code], "missing": graph.missing(code, completed)})
+
+    result = {"courses_completed": completed, "eligible": eligible, "not_eligible": not_eligible}
+    if unknown:
+        result["not_in_catalog"] = unknown
+    return result
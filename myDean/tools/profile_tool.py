@@ -2,8 +2,7 @@ from typing import Dict, Any, Annotated
 from langchain_core.tools import tool
 from langchain_core.runnables import RunnableConfig
 from typing_extensions import Annotated as AnnotatedType
-import json
-import os
+from tools.user_store import PROFILE, user_store
 
 VALID_MAJORS = [
     "Bachelor of Science in Computer Science (B.S.)",
@@ -25,15 +24,15 @@ VALID_PROFILE_KEYS = {
     "courses_completed": list
 }
 
-PROFILE_PATH = "data/profiles/"
+def empty_profile() -> Dict[str, Any]:
+    return {k: None if v is str else [] for k, v in VALID_PROFILE_KEYS.items()}
 
-def _ensure_profile_dir():
-    """Ensure the profiles directory exists"""
-    os.makedirs(PROFILE_PATH, exist_ok=True)
+def load_profile(user_id: str) -> Dict[str, Any]:
+    """Load a user's profile (an empty profile if none exists)."""
+    return user_store().get(PROFILE, user_id) or empty_profile()
 
-def _get_profile_path(user_id: str) -> str:
-    """Get the full path for a user's profile file"""
-    return os.path.join(PROFILE_PATH, f"{user_id}.json")
+def save_profile(user_id: str, profile: Dict[str, Any]):
+    user_store().put(PROFILE, user_id, profile)
 
 @tool
 def get_profile(
@@ -41,22 +40,15 @@ def get_profile(
     config: AnnotatedType[RunnableConfig, "InjectedToolArg"]
 ) -> Dict[str, Any]:
     """
-    Retrieve the user's complete profile from file storage.
+    Retrieve the user's complete profile from the profile store.
     
     Returns:
         Dict containing the user's profile information including name, grade, school,
         majors, minors, and completed courses.
     """
     user_id = config["configurable"].get("user_id", "default_user")
-    _ensure_profile_dir()
-    profile_path = _get_profile_path(user_id)
-    
-    try:
-        with open(profile_path, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        # Return empty profile if none exists
-        return {k: None if v is str else [] for k, v in VALID_PROFILE_KEYS.items()}
+    # Empty profile if none exists
+    return load_profile(user_id)
 
 @tool
 def update_profile(
@@ -87,8 +79,6 @@ def update_profile(
         String confirming the update
     """
     user_id = config["configurable"].get("user_id", "default_user")
-    _ensure_profile_dir()
-    profile_path = _get_profile_path(user_id)
     
     # Validate updates
     for key, value in updates.items():
@@ -115,31 +105,25 @@ def update_profile(
             if invalid_minors:
                 raise ValueError(f"Invalid minor(s): {invalid_minors}. Valid minors are: {VALID_MINORS}")
     
-    # Get existing profile or create new one
-    try:
-        with open(profile_path, 'r') as f:
-            profile = json.load(f)
-    except FileNotFoundError:
-        profile = {k: None if v is str else [] for k, v in VALID_PROFILE_KEYS.items()}
-    
-    # Update profile
-    for key, value in updates.items():
-        if isinstance(value, list):
-            # For list fields with direct list value, REPLACE the existing values
-            profile[key] = value
-        elif isinstance(value, dict) and VALID_PROFILE_KEYS[key] is list:
-            # Handle add/remove operations for list fields
-            existing_values = set(profile[key]) if profile[key] else set()
-            if 'add' in value:
-                existing_values.update(value['add'])
-            if 'remove' in value:
-                existing_values.difference_update(value['remove'])
-            profile[key] = list(existing_values)
-        else:
-            profile[key] = value
+    def apply_updates(profile):
+        profile = profile or empty_profile()
+        for key, value in updates.items():
+            if isinstance(value, list):
+                # For list fields with direct list value, REPLACE the existing values
+                profile[key] = value
+            elif isinstance(value, dict) and VALID_PROFILE_KEYS[key] is list:
+                # Handle add/remove operations for list fields
+                existing_values = set(profile[key]) if profile[key] else set()
+                if 'add' in value:
+                    existing_values.update(value['add'])
+                if 'remove' in value:
+                    existing_values.difference_update(value['remove'])
+                profile[key] = list(existing_values)
+            else:
+                profile[key] = value
+        return profile
     
-    # Store updated profile
-    with open(profile_path, 'w') as f:
-        json.dump(profile, f, indent=2)
+    # Read, update and store the profile in one transaction, so concurrent add/remove aren't lost
+    user_store().update(PROFILE, user_id, apply_updates)
     
     return f"Successfully updated profile fields: {', '.join(updates.keys())}" 
\ No newline at end of file
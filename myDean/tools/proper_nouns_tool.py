@@ -1,36 +1,185 @@
 # Tool to deal with high-cardinality columns:
 import ast
+import glob
+import os
 import re
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores.faiss import FAISS
-from langchain.agents.agent_toolkits import create_retriever_tool
+from langchain_core.documents import Document
+from langchain_core.tools import tool
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.utilities import SQLDatabase
+from tools.embedding_cache import EmbeddingCache, content_hash
+from tools.courses_db import ReadOnlySQLDatabase
+from tools.warmup import LazyResource
 
 
-# Import courses database
-db = SQLDatabase.from_uri("sqlite:///data/courses.db", max_string_length=3000) # max_string_length ensures full course description is returned
+# Minimum lexical score to answer without the vector index
+LEXICAL_THRESHOLD = 0.75
+
+def courses_db() -> SQLDatabase:
+    # Import courses database
+    return ReadOnlySQLDatabase.shared(include_tables=["course", "section"], max_string_length=3000) # max_string_length ensures full course description is returned
+
+def strip_numbers(string: str) -> str:
+    return re.sub(r"\b\d+\b", "", string).strip()
 
 # Function that parses the result of query into a list of elements
 def query_as_list(db, query):
     res = db.run(query)
     res = [el for sub in ast.literal_eval(res) for el in sub if el]
-    res = [re.sub(r"\b\d+\b", "", string).strip() for string in res]
+    res = [strip_numbers(string) for string in res]
     return list(set(res))
 
-##Create list of class names and teacher names
-classeNames = query_as_list(db, "SELECT Title FROM courses")
-teacherNames = query_as_list(db, "SELECT Instructor FROM courses")
+def normalize_name(name: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def dice(a: Set[str], b: Set[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+class ProperNounLexicon:
+    """Exact, normalized and fuzzy (trigram) matcher over course titles and instructors.
+
+    Answers most lookups in microseconds without an embeddings API call, and keeps
+    the course numbers associated with each title/instructor.
+    """
+
+    def __init__(self, titles: Dict[str, Set[int]], instructors: Dict[str, Set[int]]):
+        self.titles = titles
+        self.instructors = instructors
+        self.names = list(titles) + [n for n in instructors if n not in titles]
+        self.exact = {normalize_name(name): name for name in self.names}
+        # Vector index entries have numbers stripped (see query_as_list)
+        self.by_stripped = {strip_numbers(name): name for name in self.names}
+        self.tokens = {name: normalize_name(name).split() for name in self.names}
+        self.grams = {name: trigrams(normalize_name(name)) for name in self.names}
+        self.gram_index = defaultdict(set)
+        for name, grams in self.grams.items():
+            for gram in grams:
+                self.gram_index[gram].add(name)
+
+    def _token_score(self, query_tokens: List[str], name: str) -> float:
+        """Token-set match: every query token must closely match some token of the name."""
+        best = []
+        for token in query_tokens:
+            token_grams = trigrams(token)
+            best.append(max((dice(token_grams, trigrams(t)) for t in self.tokens[name]), default=0.0))
+        if not best or min(best) < 0.6:
+            return 0.0
+        return 0.9 * sum(best) / len(best)
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Best matching names with a 0-1 score, highest first."""
+        normalized = normalize_name(query)
+        if normalized in self.exact:
+            return [(self.exact[normalized], 1.0)]
+
+        query_grams = trigrams(normalized)
+        query_tokens = normalized.split()
+        candidates = set().union(*(self.gram_index.get(gram, set()) for gram in query_grams))
+        scored = [
+            (name, max(dice(query_grams, self.grams[name]), self._token_score(query_tokens, name)))
+            for name in candidates
+        ]
+        scored.sort(key=lambda match: (-match[1], match[0]))
+        return scored[:limit]
+
+    def describe(self, name: str) -> str:
+        """Name with its associated course number(s)."""
+        name = self.by_stripped.get(name, name)
+        if name in self.titles:
+            numbers = ", ".join(str(n) for n in sorted(self.titles[name]))
+            return f"{name} (Course Number: {numbers})"
+        if name in self.instructors:
+            numbers = ", ".join(str(n) for n in sorted(self.instructors[name]))
+            return f"{name} (instructor of Course Number: {numbers})"
+        return name
+
+def build_lexicon() -> ProperNounLexicon:
+    db = courses_db()
+    titles = defaultdict(set)
+    instructors = defaultdict(set)
+    for title, number in ast.literal_eval(db.run('SELECT title, course_number FROM course')):
+        if title:
+            titles[title].add(number)
+    for instructor, number in ast.literal_eval(db.run('SELECT DISTINCT instructor, course_number FROM section')):
+        if instructor:
+            instructors[instructor].add(number)
+    return ProperNounLexicon(dict(titles), dict(instructors))
+
+# Persisted index next to courses.db, keyed by a hash of the distinct names
+INDEX_DIR = "data/proper_nouns_index"
+
+def read_index(path: str):
+    """Read a FAISS index memory-mapped (falls back to a normal read if unsupported)."""
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+def load_or_build_index(names, embeddings) -> FAISS:
+    """Load the proper noun index from disk, rebuilding it only when the catalog changes.
+
+    On a rebuild only names without a cached embedding are sent to the embeddings API.
+    """
+    names = sorted(set(names))
+    index_path = os.path.join(INDEX_DIR, f"index-{content_hash(names)[:16]}.faiss")
+
+    if os.path.exists(index_path):
+        index = read_index(index_path)
+    else:
+        print("Proper noun index out of date. Rebuilding...")
+        vectors = EmbeddingCache(os.path.join(INDEX_DIR, "embeddings"), embeddings).embed(names)
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+        # Remove indexes of older catalogs, then swap in the new one
+        for stale_path in glob.glob(os.path.join(INDEX_DIR, "index-*.faiss")):
+            os.remove(stale_path)
+        faiss.write_index(index, f"{index_path}.tmp")
+        os.replace(f"{index_path}.tmp", index_path)
+
+    docstore = InMemoryDocstore({str(i): Document(page_content=name) for i, name in enumerate(names)})
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id={i: str(i) for i in range(len(names))}
+    )
+
+def build_proper_noun_index() -> FAISS:
+    db = courses_db()
+
+    ##Create list of class names and teacher names
+    classeNames = query_as_list(db, "SELECT title FROM course")
+    teacherNames = query_as_list(db, "SELECT instructor FROM section")
+
+    ## Embed results in vector database (cached on disk, see load_or_build_index)
+    return load_or_build_index(classeNames + teacherNames, OpenAIEmbeddings())
+
+# Built on first use (or by the background warm-up), not at import
+proper_noun_lexicon = LazyResource("proper_nouns_lexicon", build_lexicon)
+proper_noun_index = LazyResource("proper_nouns_index", build_proper_noun_index)
 
 # Create a retriever tool that the agent can execute at its discretion:
-## Embed results in vector database
-vector_db = FAISS.from_texts(classeNames + teacherNames, OpenAIEmbeddings())
-
-## Create and define retriever tool
-retriever = vector_db.as_retriever(search_kwargs={"k": 5})
-description = """Use to look up values to filter on. Input is an approximate spelling of the proper noun, output is \
-valid proper nouns. Use the noun most similar to the search."""
-proper_nouns_tool = create_retriever_tool(
-    retriever,
-    name="search_proper_nouns",
-    description=description,
-)
\ No newline at end of file
+@tool
+def search_proper_nouns(query: str) -> str:
+    """Use to look up values to filter on. Input is an approximate spelling of the proper noun, output is \
+valid proper nouns (with their course numbers). Use the noun most similar to the search."""
+    lexicon = proper_noun_lexicon.get()
+
+    # Lexical match first; only fall back to the embedding search when nothing is close enough
+    matches = [name for name, score in lexicon.search(query) if score >= LEXICAL_THRESHOLD]
+    if not matches:
+        docs = proper_noun_index.get().similarity_search(query, k=5)
+        matches = [doc.page_content for doc in docs]
+    return "\n\n".join(lexicon.describe(name) for name in matches)
+
+proper_nouns_tool = search_proper_nouns
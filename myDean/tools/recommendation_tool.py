@@ -0,0 +1,127 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Annotated, Any, Dict, List, Tuple
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+from tools.degree_requirements import completed_courses, degree_requirements
+from tools.prerequisite_tool import PrerequisiteGraph, prerequisite_graph
+from tools.requirements_tool import AuditState
+from tools.user_store import PROFILE, user_store
+
+# Students whose ranked recommendations are kept in memory (least recently used are dropped)
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024"))
+
+DEFAULT_TOP_N = 5
+
+def rank_courses(profile: Dict[str, Any], graph: PrerequisiteGraph) -> Dict[str, Any]:
+    """Every catalog course a profile can take next that counts towards an unmet requirement, best first.
+
+    A course is a candidate when its prerequisites are met, it isn't completed and it would
+    raise the count of a requirement of a declared major/minor that isn't met yet. Candidates
+    are ranked by the number of courses they unlock (directly or through other courses) that
+    also count towards an unmet requirement, then by the number of requirements they count towards.
+    """
+    completed = completed_courses(profile.get("courses_completed"))
+    names = [n for n in (profile.get("majors") or []) + (profile.get("minors") or []) if n]
+    states = {name: AuditState(req, completed) for name in names if (req := degree_requirements.program(name))}
+
+    # Requirements each course not taken yet would count towards (catalog codes use spaces, requirements dashes)
+    counts_towards: Dict[str, List[str]] = {}
+    completed_codes = [c.replace("-", " ") for c in completed]
+    done = graph.mask(completed_codes)
+    for code in graph.order:
+        if done & graph.bit[code]:
+            continue
+        course = code.replace(" ", "-")
+        towards = [
+            f"{name}: {bucket}"
+            for name, state in states.items()
+            for bucket in sorted(state.what_if([course])["changes"])
+        ]
+        if towards:
+            counts_towards[code] = towards
+
+    def unlocked(code: str, seen: set) -> set:
+        for course in graph.unlocks.get(code, []):
+            if course not in seen:
+                seen.add(course)
+                unlocked(course, seen)
+        return seen
+
+    recommendations = []
+    for code in graph.eligible(completed_codes):
+        if code not in counts_towards:
+            continue
+        unlocks = sorted(c for c in unlocked(code, set()) if c in counts_towards)
+        recommendations.append({
+            "course": code,
+            "title": graph.titles[code],
+            "counts_towards": counts_towards[code],
+            "unlocks": unlocks
+        })
+    recommendations.sort(key=lambda r: (-len(r["unlocks"]), -len(r["counts_towards"]), r["course"]))
+    return {"programs": list(states), "recommendations": recommendations}
+
+class RecommendationCache:
+    """Ranked recommendations per user, valid while the profile, requirements and catalog are unchanged.
+
+    Entries are stamped with the profile version from the user store (bumped by every write,
+    including update_profile and writes from other workers), the requirements file's mtime and
+    the prerequisite graph, so a stale entry is recomputed on its next lookup.
+    """
+
+    def __init__(self, maxsize: int = RECOMMENDATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[str, Tuple[Tuple, PrerequisiteGraph, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        store = user_store()
+        graph = prerequisite_graph()
+        degree_requirements.data()
+        # Version first: a profile written in between is recomputed on the next lookup
+        stamp = (store.version(PROFILE, user_id), degree_requirements.mtime)
+        with self._lock:
+            entry = self.entries.get(user_id)
+            # The graph is kept in the entry and compared by identity (a rebuilt graph could reuse an id)
+            if entry and entry[0] == stamp and entry[1] is graph:
+                self.entries.move_to_end(user_id)
+                return entry[2]
+
+        ranked = rank_courses(store.get(PROFILE, user_id) or {}, graph)
+        if self.maxsize > 0:
+            with self._lock:
+                self.entries[user_id] = (stamp, graph, ranked)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        return ranked
+
+recommendations = RecommendationCache()
+
+@tool
+def recommend_courses(
+    config: Annotated[RunnableConfig, "InjectedToolArg"],
+    top_n: int = DEFAULT_TOP_N
+) -> Dict[str, Any]:
+    """
+    Recommend the courses the user should take next for their declared majors/minors, best first.
+
+    Args:
+        config: The config object containing user_id
+        top_n: Number of courses to return (default 5)
+
+    Returns:
+        Catalog courses whose prerequisites are met, not completed and counting towards an unmet
+        requirement, with the requirements each counts towards and the needed courses it unlocks.
+    """
+    user_id = config["configurable"].get("user_id", "default_user")
+    ranked = recommendations.get(user_id)
+    if not ranked["programs"]:
+        return {"error": "No declared major or minor found in requirements"}
+    return {
+        "programs": ranked["programs"],
+        "recommendations": ranked["recommendations"][:max(top_n, 1)],
+        "candidates": len(ranked["recommendations"])
+    }
@@ -1,44 +1,59 @@
-from typing import Dict, Any, Annotated
+import re
+from collections import Counter
+from typing import Dict, Any, Annotated, Iterable, List, Optional
 from langchain_core.tools import tool
 from langchain_core.runnables import RunnableConfig
 from typing_extensions import Annotated as AnnotatedType
-import json
-import os
-import re
+from tools.degree_requirements import ProgramRequirements, completed_courses, degree_requirements
+from tools.user_store import PROFILE, user_store
 
-# Constants for exact program names
-PROGRAM_NAMES = {
-    "majors": {
-        "BS": "Bachelor of Science in Computer Science (B.S.)",
-        "AB": "Bachelor of Arts in Computer Science (A.B.)",
-        "CSES": "Bachelor of Arts in Computer Science Ethics and Society (CSES)"
-    },
-    "minors": {
-        "CS": "Minor in Computer Science",
-        "TES": "Technology Ethics and Society"
-    }
-}
-
-# Common variations of program names for matching
+# Common variations of program names, each mapped to a part of exactly one program name in degree_requirements.json
 PROGRAM_NAME_VARIATIONS = {
     # Major variations
-    "bs": "Bachelor of Science in Computer Science (B.S.)",
-    "b.s.": "Bachelor of Science in Computer Science (B.S.)",
-    "bachelor of science": "Bachelor of Science in Computer Science (B.S.)",
-    "ab": "Bachelor of Arts in Computer Science (A.B.)",
-    "a.b.": "Bachelor of Arts in Computer Science (A.B.)",
-    "bachelor of arts": "Bachelor of Arts in Computer Science (A.B.)",
-    "cses": "Bachelor of Arts in Computer Science Ethics and Society (CSES)",
-    "ethics": "Bachelor of Arts in Computer Science Ethics and Society (CSES)",
+    "bs": "(B.S.)",
+    "b.s.": "(B.S.)",
+    "bachelor of science": "(B.S.)",
+    "ab": "(A.B.)",
+    "a.b.": "(A.B.)",
+    "bachelor of arts": "(A.B.)",
+    "cses": "(CSES)",
+    "ethics": "(CSES)",
     # Minor variations
     "cs minor": "Minor in Computer Science",
     "computer science minor": "Minor in Computer Science",
     "minor cs": "Minor in Computer Science",
     "minor in cs": "Minor in Computer Science",
-    "tes": "Technology Ethics and Society",
-    "tech ethics": "Technology Ethics and Society"
+    "tes": "Technology, Ethics, and Society",
+    "technology ethics and society": "Technology, Ethics, and Society",
+    "tech ethics": "Technology, Ethics, and Society"
 }
 
+_aliases: Dict[str, str] = {}
+_aliases_mtime = None
+
+def _simplify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+
+def program_aliases() -> Dict[str, str]:
+    """Variation (lowercase, also with punctuation dropped) -> program name, rebuilt when the requirements change."""
+    global _aliases, _aliases_mtime
+    degree_requirements.data()
+    if _aliases_mtime != degree_requirements.mtime:
+        names = list(degree_requirements.programs)
+        aliases = {}
+        for name in names:
+            aliases[name.lower()] = aliases[_simplify(name)] = name
+        for variation, part in PROGRAM_NAME_VARIATIONS.items():
+            matches = [name for name in names if part in name]
+            if len(matches) == 1:
+                aliases[variation] = matches[0]
+        _aliases, _aliases_mtime = aliases, degree_requirements.mtime
+    return _aliases
+
+def valid_program_names() -> List[str]:
+    degree_requirements.data()
+    return list(degree_requirements.programs)
+
 def normalize_program_name(program: str) -> str:
     """
     Normalize program name to match the official names in requirements.
@@ -47,27 +62,12 @@ def normalize_program_name(program: str) -> str:
     if not program:
         return None
     
-    # If it's already an exact match, return it
-    for category in PROGRAM_NAMES.values():
-        if program in category.values():
-            return program
-    
-    # Try to match variations
-    normalized = PROGRAM_NAME_VARIATIONS.get(program.lower().strip())
-    return normalized
-
-REQUIREMENTS_FILE = "data/degree_requirements.json"
-
-def matches_pattern(course_code: str, patterns: list) -> bool:
-    """Check if a course code matches any of the given patterns"""
-    return any(re.match(pattern, course_code) for pattern in patterns)
-
-def normalize_course_code(course_code: str) -> str:
-    """Normalize course code format to use dashes"""
-    return course_code.replace(" ", "-")
+    aliases = program_aliases()
+    key = program.lower().strip()
+    return aliases.get(key) or aliases.get(_simplify(key))
 
 @tool
-def get_degree_requirements(program: str = None) -> Dict[str, Any]:
+def get_degree_requirements(program: Optional[str] = None) -> Dict[str, Any]:
     """
     Retrieve degree requirements. If program is specified, only return requirements for that program.
     
@@ -75,15 +75,14 @@ def get_degree_requirements(program: str = None) -> Dict[str, Any]:
         program: Optional. The specific program to get requirements for. Can use common variations
                 (e.g., "CS Minor", "AB", "Bachelor of Arts", etc.)
     """
-    with open(REQUIREMENTS_FILE, 'r') as f:
-        all_requirements = json.load(f)
+    all_requirements = degree_requirements.data()
     
     if not program:
         return all_requirements
     
     normalized_program = normalize_program_name(program)
     if not normalized_program:
-        return {"error": f"Program '{program}' not recognized. Valid programs are: {list(PROGRAM_NAMES['majors'].values()) + list(PROGRAM_NAMES['minors'].values())}"}
+        return {"error": f"Program '{program}' not recognized. Valid programs are: {valid_program_names()}"}
     
     result = {}
     
@@ -102,7 +101,7 @@ def get_degree_requirements(program: str = None) -> Dict[str, Any]:
 @tool
 def check_requirements_progress(
     config: Annotated[RunnableConfig, "InjectedToolArg"],
-    program: str = None
+    program: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Check progress towards completing major/minor requirements based on completed courses.
@@ -115,152 +114,255 @@ def check_requirements_progress(
     user_id = config["configurable"].get("user_id", "default_user")
     
     # Get user's profile
-    profile_path = f"data/profiles/{user_id}.json"
-    try:
-        with open(profile_path, 'r') as f:
-            profile = json.load(f)
-    except FileNotFoundError:
+    profile = user_store().get(PROFILE, user_id)
+    if profile is None:
         return {"error": "Profile not found"}
     
     # Normalize all completed courses to use dashes
-    normalized_courses = [normalize_course_code(c) for c in profile.get("courses_completed", [])]
-    
-    # Get degree requirements
-    with open(REQUIREMENTS_FILE, 'r') as f:
-        requirements = json.load(f)
-    
-    progress = {}
+    normalized_courses = completed_courses(profile.get("courses_completed", []))
     
     # If program is specified, only check that program
     if program:
         normalized_program = normalize_program_name(program)
         if not normalized_program:
-            return {"error": f"Program '{program}' not recognized. Valid programs are: {list(PROGRAM_NAMES['majors'].values()) + list(PROGRAM_NAMES['minors'].values())}"}
+            return {"error": f"Program '{program}' not recognized. Valid programs are: {valid_program_names()}"}
         
-        if normalized_program in requirements["majors"]:
-            progress = check_major_progress(normalized_program, requirements["majors"][normalized_program], normalized_courses)
-        elif normalized_program in requirements["minors"]:
-            progress = check_minor_progress(normalized_program, requirements["minors"][normalized_program], normalized_courses)
-        else:
+        requirements = degree_requirements.program(normalized_program)
+        if not requirements:
             return {"error": f"Program '{normalized_program}' not found in requirements"}
-        return progress
+        if requirements.kind == "major":
+            return check_major_progress(requirements, normalized_courses)
+        return check_minor_progress(requirements, normalized_courses)
     
     # Otherwise check all declared programs
-    for major in profile.get("majors", []):
-        if major in requirements["majors"]:
-            progress[major] = check_major_progress(major, requirements["majors"][major], normalized_courses)
-    
-    for minor in profile.get("minors", []):
-        if minor in requirements["minors"]:
-            progress[minor] = check_minor_progress(minor, requirements["minors"][minor], normalized_courses)
+    progress = {}
+    for name in profile.get("majors", []) + profile.get("minors", []):
+        requirements = degree_requirements.program(name)
+        if requirements and requirements.kind == "major":
+            progress[name] = check_major_progress(requirements, normalized_courses)
+        elif requirements:
+            progress[name] = check_minor_progress(requirements, normalized_courses)
     
     return progress
 
-def check_major_progress(major: str, req: Dict, normalized_courses: list) -> Dict:
+def check_major_progress(req: ProgramRequirements, normalized_courses: list) -> Dict:
     """Helper function to check progress for a major"""
-    # Check required courses
-    required_courses = list(req["required_courses"].keys())
-    completed_required = [c for c in normalized_courses 
-                         if c in required_courses]
+    evaluation = req.evaluate(normalized_courses)
+    completed_required = evaluation["required"]
     
     # Check math requirements if they exist
     math_progress = None
     completed_math = []
-    if "math_requirements" in req:
-        math_courses = list(req["math_requirements"].keys())
-        elective_slots = sum(1 for course in math_courses if "MATH-ELECTIVE" in course)
-        required_math = [course for course in math_courses if "MATH-ELECTIVE" not in course]
-        
-        # Get valid math electives from requirements
-        with open(REQUIREMENTS_FILE, 'r') as f:
-            all_requirements = json.load(f)
-            valid_math_courses = list(all_requirements["valid_math_electives"].keys())
-        
-        # First check specifically required math courses
-        completed_math = [c for c in normalized_courses if c in required_math]
-        
-        # Then check for valid math electives
-        available_electives = [c for c in normalized_courses 
-                             if c in valid_math_courses and c not in completed_math]
-        
-        # Add up to elective_slots number of valid electives
-        completed_math.extend(available_electives[:elective_slots])
-        
+    if req.math_requirements:
+        # Specifically required math courses, then up to one valid math elective per elective slot
+        completed_math = evaluation["math_required"] + evaluation["math_electives"]
         math_progress = {
             "completed": len(completed_math),
-            "required": len(math_courses),
+            "required": len(req.math_requirements),
             "courses": completed_math
         }
     
     # Check electives
-    elective_patterns = req["electives"]["valid_patterns"]
-    completed_electives = [
-        c for c in normalized_courses 
-        if matches_pattern(c, elective_patterns) and 
-        (not req["electives"]["exclude_required"] or c not in required_courses)
-    ]
+    required_count = req.electives.required_count
+    completed_electives = evaluation["electives"]
     
     # Calculate total courses completed and required
     total_completed = (
         len(completed_required) +  # Required courses
         len(completed_math) +      # Math requirements
-        min(len(completed_electives), req["electives"]["required_count"])  # Electives
+        min(len(completed_electives), required_count)  # Electives
     )
     
     total_required = (
-        len(required_courses) +    # Required courses
-        (len(req["math_requirements"]) if "math_requirements" in req else 0) +  # Math requirements
-        req["electives"]["required_count"]  # Required electives
+        len(req.required_courses) +    # Required courses
+        len(req.math_requirements) +   # Math requirements
+        required_count                 # Required electives
     )
     
     return {
         "required_courses": {
             "completed": len(completed_required),
-            "total": len(required_courses),
+            "total": len(req.required_courses),
             "courses": completed_required
         },
         "electives": {
-            "completed": min(len(completed_electives), req["electives"]["required_count"]),
-            "required": req["electives"]["required_count"],
-            "courses": completed_electives[:req["electives"]["required_count"]]
+            "completed": min(len(completed_electives), required_count),
+            "required": required_count,
+            "courses": completed_electives[:required_count]
         },
         "math_requirements": math_progress,
         "total_progress": (total_completed / total_required) * 100
     }
 
-def check_minor_progress(minor: str, req: Dict, normalized_courses: list) -> Dict:
+def check_minor_progress(req: ProgramRequirements, normalized_courses: list) -> Dict:
     """Helper function to check progress for a minor"""
-    # Check required courses
-    required_courses = list(req["required_courses"].keys())
-    completed_required = [c for c in normalized_courses 
-                         if c in required_courses]
+    evaluation = req.evaluate(normalized_courses)
+    completed_required = evaluation["required"]
     
     # Check electives if they exist
     electives_progress = None
-    total_requirements = len(required_courses)
+    total_requirements = len(req.required_courses)
     completed_count = len(completed_required)
     
-    if "electives" in req:
-        elective_patterns = req["electives"]["valid_patterns"]
-        completed_electives = [
-            c for c in normalized_courses 
-            if matches_pattern(c, elective_patterns) and 
-            (not req["electives"]["exclude_required"] or c not in required_courses)
-        ]
+    if req.electives:
+        required_count = req.electives.required_count
+        completed_electives = evaluation["electives"]
         electives_progress = {
-            "completed": min(len(completed_electives), req["electives"]["required_count"]),
-            "required": req["electives"]["required_count"],
-            "courses": completed_electives[:req["electives"]["required_count"]]
+            "completed": min(len(completed_electives), required_count),
+            "required": required_count,
+            "courses": completed_electives[:required_count]
         }
-        total_requirements += req["electives"]["required_count"]
-        completed_count += min(len(completed_electives), req["electives"]["required_count"])
+        total_requirements += required_count
+        completed_count += min(len(completed_electives), required_count)
     
     return {
         "required_courses": {
             "completed": len(completed_required),
-            "total": len(required_courses),
+            "total": len(req.required_courses),
             "courses": completed_required
         },
         "electives": electives_progress,
         "total_progress": (completed_count / total_requirements) * 100
-    } 
\ No newline at end of file
+    }
+
+# Summary bucket each requirement count belongs to
+BUCKET_NAMES = {
+    "required": "required_courses",
+    "math_required": "math_requirements",
+    "math_electives": "math_requirements",
+    "electives": "electives"
+}
+
+class AuditState:
+    """Progress of a student towards one program, kept as per-requirement course counts.
+
+    Built once from the completed courses; a what-if only re-counts the requirements the
+    hypothetical courses count towards (see ProgramRequirements.buckets_of) and never
+    touches the stored profile.
+    """
+
+    def __init__(self, program: ProgramRequirements, completed: Iterable[str] = ()):
+        self.program = program
+        self.completed = set()
+        self.counts = Counter()
+        self._summary = None
+        self.apply(completed)
+
+    def apply(self, add: Iterable[str] = (), remove: Iterable[str] = ()):
+        """Update the state in place with completed (add) or dropped (remove) courses."""
+        for course in completed_courses(remove):
+            if course in self.completed:
+                self.completed.discard(course)
+                self.counts.subtract(self.program.buckets_of(course))
+        for course in completed_courses(add):
+            if course not in self.completed:
+                self.completed.add(course)
+                self.counts.update(self.program.buckets_of(course))
+        self._summary = None
+
+    def summary(self, counts: Counter = None) -> Dict[str, Any]:
+        """Completed/required per requirement and total_progress (as in check_requirements_progress)."""
+        if counts is None and self._summary is not None:
+            return self._summary
+        c = self.counts if counts is None else counts
+        req = self.program
+        math = c["math_required"] + min(c["math_electives"], req.math_elective_slots)
+        electives_required = req.electives.required_count if req.electives else 0
+        electives = min(c["electives"], electives_required)
+
+        buckets = {"required_courses": {"completed": c["required"], "required": len(req.required_courses)}}
+        if req.math_requirements:
+            buckets["math_requirements"] = {"completed": math, "required": len(req.math_requirements)}
+        if req.electives:
+            buckets["electives"] = {"completed": electives, "required": electives_required}
+        for additional in req.additional:
+            buckets[additional.name] = {
+                "completed": min(c[additional.name], additional.required_count),
+                "required": additional.required_count
+            }
+
+        total = len(req.required_courses) + len(req.math_requirements) + electives_required
+        done = c["required"] + math + electives
+        summary = {"requirements": buckets, "total_progress": (done / total) * 100 if total else 0}
+        if counts is None:
+            self._summary = summary
+        return summary
+
+    def what_if(self, add: Iterable[str] = (), remove: Iterable[str] = ()) -> Dict[str, Any]:
+        """Progress change if the courses in `add` were completed (and those in `remove` weren't)."""
+        add = [c for c in completed_courses(add) if c not in self.completed]
+        remove = [c for c in completed_courses(remove) if c in self.completed]
+        counts = self.counts.copy()
+        affected = set()
+        for course in add:
+            counts.update(self.program.buckets_of(course))
+            affected.update(self.program.buckets_of(course))
+        for course in remove:
+            counts.subtract(self.program.buckets_of(course))
+            affected.update(self.program.buckets_of(course))
+
+        before, after = self.summary(), self.summary(counts)
+        changes = {}
+        for bucket in {BUCKET_NAMES.get(b, b) for b in affected}:
+            old, new = before["requirements"][bucket], after["requirements"][bucket]
+            if old != new:
+                changes[bucket] = {"before": old["completed"], "after": new["completed"], "required": new["required"]}
+        return {
+            "counts_towards": {c: sorted({BUCKET_NAMES.get(b, b) for b in self.program.buckets_of(c)}) for c in add},
+            "changes": changes,
+            "total_progress": {
+                "before": round(before["total_progress"], 1),
+                "after": round(after["total_progress"], 1),
+                "delta": round(after["total_progress"] - before["total_progress"], 1)
+            }
+        }
+
+def what_if(profile: Dict[str, Any], scenarios: List[List[str]], program: str = None) -> Dict[str, Any]:
+    """Evaluate hypothetical course lists against a profile's programs (or one program) without changing it.
+
+    The audit state of each program is built once and shared by every scenario.
+    """
+    if program:
+        names = [normalize_program_name(program)]
+        if not names[0]:
+            return {"error": f"Program '{program}' not recognized. Valid programs are: {valid_program_names()}"}
+    else:
+        names = profile.get("majors", []) + profile.get("minors", [])
+    completed = completed_courses(profile.get("courses_completed", []))
+    states = {name: AuditState(req, completed) for name in names if (req := degree_requirements.program(name))}
+    if not states:
+        return {"error": "No declared program found in requirements" if not program else f"Program '{names[0]}' not found in requirements"}
+
+    results, completed = [], set(completed)
+    for scenario in scenarios:
+        planned = completed_courses(scenario)
+        results.append({
+            "courses": planned,
+            "already_completed": [c for c in planned if c in completed],
+            "programs": {name: state.what_if(planned) for name, state in states.items()}
+        })
+    return {"scenarios": results}
+
+@tool
+def what_if_progress(
+    config: Annotated[RunnableConfig, "InjectedToolArg"],
+    scenarios: List[List[str]],
+    program: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Show how planned courses would change progress towards the user's majors/minors, without updating the profile.
+    
+    Args:
+        config: The config object containing user_id
+        scenarios: One or more lists of hypothetical courses to compare, e.g. [["COSC-3020", "MATH-2140"], ["COSC-3020"]]
+        program: Optional. Only check this program. Can use common variations (e.g., "CS Minor", "AB", etc.)
+    
+    Returns:
+        For each scenario and program: which requirements each course counts towards, the requirements
+        whose counts change, and total_progress before/after.
+    """
+    user_id = config["configurable"].get("user_id", "default_user")
+    profile = user_store().get(PROFILE, user_id)
+    if profile is None:
+        return {"error": "Profile not found"}
+    return what_if(profile, scenarios, program)
@@ -0,0 +1,239 @@
+import argparse
+import bisect
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.tools import tool
+from tools.catalog import (
+    DAY_BITS, SLOT_MINUTES, SLOTS_PER_DAY, SUBJECT, WEEKDAYS, catalog, course_code, format_minutes, occupancy
+)
+from tools.prerequisite_tool import normalize_code
+
+DAY_SLOTS_MASK = (1 << SLOTS_PER_DAY) - 1
+
+def parse_time_of_day(value: str) -> int:
+    """Minutes after midnight of "10 AM", "10:30am", "3:30 PM" or "15:30"."""
+    match = re.fullmatch(r"\s*(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])?\s*", str(value))
+    if not match:
+        raise ValueError(f"Invalid time: {value}")
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or "").upper()
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem == "PM" else 0)
+    return hour * 60 + minute
+
+def is_full(section: Dict) -> bool:
+    return (section.get("enrollment_status") or "").upper().startswith("FULL")
+
+def schedule_score(sections: List[Dict], used: int) -> Tuple[int, int, int]:
+    """Ranking of a schedule, lower is better: (full sections, days on campus, idle minutes between classes)."""
+    days, gap_slots = 0, 0
+    for i in range(len(WEEKDAYS)):
+        day = (used >> (i * SLOTS_PER_DAY)) & DAY_SLOTS_MASK
+        if day:
+            days += 1
+            span = day.bit_length() - ((day & -day).bit_length() - 1)
+            gap_slots += span - day.bit_count()
+    return sum(map(is_full, sections)), days, gap_slots * SLOT_MINUTES
+
+def solve(candidates: List[List[Dict]], top_n: int = 3) -> List[Tuple[Tuple[int, int, int], List[Dict]]]:
+    """Best conflict-free combinations with one section per course.
+
+    Args:
+        candidates: For each course, the sections allowed by the constraints (each with an "occupancy" mask)
+        top_n: Number of schedules to return
+
+    Returns:
+        (score, sections) pairs, best first
+    """
+    # (section, occupancy, weekday bitmask, full) per option
+    options = [[(s, s["occupancy"], _days_of(s["occupancy"]), is_full(s)) for s in sections] for sections in candidates]
+    best: List[Tuple[Tuple[int, int, int], List[int], List[Dict]]] = []
+    chosen: List[Dict] = []
+
+    def search(remaining: List[List[Tuple]], used: int, full: int, days: int):
+        if len(best) == top_n:
+            # Lower bounds for every completion of this branch: each course adds at least its fewest
+            # full sections, the schedule spans at least the days of the course needing most new days,
+            # and idle time between classes only shrinks by what the remaining courses can fill
+            full_bound = full + sum(min(o[3] for o in opts) for opts in remaining)
+            if full_bound > best[-1][0][0]:
+                return
+            days_bound = days.bit_count() + max(
+                (min((o[2] & ~days).bit_count() for o in opts) for opts in remaining), default=0
+            )
+            if (full_bound, days_bound) > best[-1][0][:2]:
+                return
+            holes = _idle_slots(used)
+            fillable = sum(max((o[1] & holes).bit_count() for o in opts) for opts in remaining)
+            idle_bound = max(holes.bit_count() - fillable, 0) * SLOT_MINUTES
+            if (full_bound, days_bound, idle_bound) > best[-1][0]:
+                return
+        if not remaining:
+            score = schedule_score(chosen, used)
+            entry = (score, sorted(s["crn"] for s in chosen), list(chosen))
+            bisect.insort(best, entry, key=lambda e: (e[0], e[1]))
+            del best[top_n:]
+            return
+
+        # Course with the fewest sections left that fit first, the others keep only the sections that still fit
+        i = min(range(len(remaining)), key=lambda k: len(remaining[k]))
+        rest = remaining[:i] + remaining[i + 1:]
+        # Sections adding no full section and fewest new days first, so good schedules tighten the bounds early
+        ordered = sorted(remaining[i], key=lambda o: (o[3], (o[2] & ~days).bit_count(), o[0]["crn"]))
+        for section, mask, section_days, section_full in ordered:
+            combined = used | mask
+            narrowed = []
+            for opts in rest:
+                fitting = [o for o in opts if not o[1] & combined]
+                if not fitting:
+                    break
+                narrowed.append(fitting)
+            else:
+                chosen.append(section)
+                search(narrowed, combined, full + section_full, days | section_days)
+                chosen.pop()
+
+    if all(options):
+        search(options, 0, 0, 0)
+    return [(score, sections) for score, _, sections in best]
+
+def _idle_slots(used: int) -> int:
+    """Free slots between the first and last class of each day of an occupancy mask."""
+    holes = 0
+    for i in range(len(WEEKDAYS)):
+        day = (used >> (i * SLOTS_PER_DAY)) & DAY_SLOTS_MASK
+        if day:
+            span = (1 << day.bit_length()) - (day & -day)
+            holes |= (span & ~day) << (i * SLOTS_PER_DAY)
+    return holes
+
+def _days_of(used: int) -> int:
+    """Weekday bitmask (Monday = bit 0) of an occupancy mask."""
+    return sum(1 << i for i in range(len(WEEKDAYS)) if (used >> (i * SLOTS_PER_DAY)) & DAY_SLOTS_MASK)
+
+def allowed_sections(course_number, earliest_start: Optional[int], latest_end: Optional[int],
+                     free_days: int, include_full: bool) -> List[Dict]:
+    """Sections of a course that satisfy the constraints."""
+    result = []
+    for section in catalog.sections_of(course_number):
+        if not include_full and is_full(section):
+            continue
+        if section["days"]:
+            if section["days"] & free_days:
+                continue
+            if earliest_start is not None and section["start_minute"] < earliest_start:
+                continue
+            if latest_end is not None and section["end_minute"] > latest_end:
+                continue
+        result.append(section)
+    return result
+
+def _schedule_section(section: Dict) -> Dict:
+    """A section of a schedule, with the times in the format calendar_tool expects when it meets on set days."""
+    details = {
+        "title": f"{catalog.course(section['course_number'])['title']} (Section {section['section']})",
+        "course_number": section["course_number"],
+        "crn": section["crn"],
+        "instructor": section["instructor"],
+        "schedule": section["meeting_details"],
+        "enrollment_status": section["enrollment_status"]
+    }
+    if section["days"]:
+        details["startTime"] = format_minutes(section["start_minute"])
+        details["endTime"] = format_minutes(section["end_minute"])
+    else:
+        details["no_set_meeting_time"] = True
+    return details
+
+@tool
+def build_schedule(
+    course_numbers: List[str],
+    earliest_start: Optional[str] = None,
+    latest_end: Optional[str] = None,
+    free_days: Optional[List[str]] = None,
+    include_full: bool = True,
+    top_n: int = 3
+) -> Dict[str, Any]:
+    """Find the best conflict-free schedules (one section of each course) for a list of courses.
+
+    Args:
+        course_numbers: The courses to schedule, e.g. ["COSC 2010", "COSC 2020", "1110"]
+        earliest_start: Optional. No classes before this time, e.g. "10:00 AM"
+        latest_end: Optional. No classes ending after this time, e.g. "5:00 PM"
+        free_days: Optional. Days without classes, e.g. ["Friday"]
+        include_full: Whether full sections (waitlist only) may be used, they are ranked last either way
+        top_n: Number of schedules to return
+
+    Returns:
+        The ranked schedules (fewest full sections, then fewest days on campus, then least time between classes).
+        Each section has the fields calendar_tool needs to add it (title, crn, instructor, schedule, startTime, endTime),
+        except sections without set meeting days, which have no_set_meeting_time instead of the times
+        and can't be added with calendar_tool.
+    """
+    try:
+        start = parse_time_of_day(earliest_start) if earliest_start else None
+        end = parse_time_of_day(latest_end) if latest_end else None
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    unknown_days = [day for day in free_days or [] if day.strip().lower() not in DAY_BITS]
+    if unknown_days:
+        return {"success": False, "error": f"Unknown days: {unknown_days}. Use {WEEKDAYS}"}
+    free_mask = sum(DAY_BITS[day.strip().lower()] for day in set(free_days or []))
+
+    courses, candidates = [], []
+    # "2010", "COSC-2010" and "COSC 2010" are the same course
+    for number in dict.fromkeys(normalize_code(c) for c in course_numbers):
+        course = catalog.course(number)
+        if not course:
+            return {"success": False, "error": f"Course {number} not found in the catalog"}
+        sections = allowed_sections(number, start, end, free_mask, include_full)
+        if not sections:
+            return {"success": False, "error": f"No section of {course_code(SUBJECT, course['course_number'])} {course['title']} fits the constraints"}
+        courses.append(course)
+        candidates.append(sections)
+
+    solutions = solve(candidates, top_n=max(1, top_n))
+    if not solutions:
+        return {"success": False, "error": "Every combination of sections has a time conflict"}
+
+    schedules = []
+    for (full, days, idle_minutes), sections in solutions:
+        schedules.append({
+            "days_on_campus": days,
+            "minutes_between_classes": idle_minutes,
+            "full_sections": full,
+            "sections": [_schedule_section(s) for s in sorted(sections, key=lambda s: s["course_number"])]
+        })
+    return {"success": True, "schedules": schedules}
+
+def benchmark(courses: int = 6, sections: int = 8, seed: int = 0):
+    """Time the solver on a synthetic load of `courses` courses with `sections` random sections each."""
+    rng = random.Random(seed)
+    patterns = [DAY_BITS["monday"] | DAY_BITS["wednesday"], DAY_BITS["tuesday"] | DAY_BITS["thursday"],
+                DAY_BITS["wednesday"] | DAY_BITS["friday"], DAY_BITS["monday"] | DAY_BITS["wednesday"] | DAY_BITS["friday"]]
+    candidates = []
+    for c in range(courses):
+        course_sections = []
+        for s in range(sections):
+            days, start = rng.choice(patterns), rng.randrange(8 * 60, 19 * 60, 30)
+            course_sections.append({
+                "crn": c * 100 + s, "course_number": c, "section": s, "enrollment_status": "",
+                "occupancy": occupancy(days, start, start + 75)
+            })
+        candidates.append(course_sections)
+    begin = time.perf_counter()
+    solutions = solve(candidates, top_n=5)
+    elapsed = (time.perf_counter() - begin) * 1000
+    print(f"{courses} courses x {sections} sections: {len(solutions)} schedules in {elapsed:.1f} ms")
+
+if __name__ == "__main__":
+    # python -m tools.schedule_tool --benchmark
+    parser = argparse.ArgumentParser(description="Schedule solver.")
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--courses", type=int, default=6)
+    parser.add_argument("--sections", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.courses, args.sections)
@@ -1,6 +1,6 @@
 from langchain_openai import ChatOpenAI
 from tools.transcript_tool import transcript_tool
-from tools.course_conversion_tool import normalize_course_numbers
+from tools.course_conversion_tool import convert_course_numbers
 import os
 from dotenv import load_dotenv
 
@@ -30,9 +30,12 @@ def process_transcript(file_path):
         
         # Normalize the courses
         try:
-            normalized_courses = normalize_course_numbers(courses)
-            result['formatted_courses'] = normalized_courses
-            print(f"Normalized courses: {normalized_courses}")
+            converted = convert_course_numbers(courses)
+            result['formatted_courses'] = converted['courses']
+            result['unrecognized_courses'] = converted['unrecognized']
+            print(f"Normalized courses: {converted['courses']}")
+            if converted['unrecognized']:
+                print(f"Unrecognized courses: {converted['unrecognized']}")
         except Exception as e:
             print(f"Error normalizing courses: {e}")
             # If normalization fails, use the original courses
@@ -1,4 +1,4 @@
-from langchain_openai import OpenAI
+from langchain_openai import ChatOpenAI
 from typing import Dict
 import base64
 import ast
@@ -35,9 +35,13 @@ def encode_image(image_path: str, is_pdf: bool = False) -> str:
             return [base64.b64encode(image_file.read()).decode('utf-8')]
 
 # Tool that processes transcript images/PDFs using the vision-capable LLM
-def transcript_tool(file_path: str, llm=OpenAI(model="gpt-4o")) -> Dict:
+def transcript_tool(file_path: str, llm=None) -> Dict:
     """Tool for processing transcript images/PDFs using the vision-capable LLM."""
 
+    # Created per call rather than as a default argument, so importing this module stays cheap
+    if llm is None:
+        llm = ChatOpenAI(model="gpt-4o")
+
     try:
         is_pdf = file_path.lower().endswith('.pdf')
         base64_images = encode_image(file_path, is_pdf=is_pdf)
@@ -0,0 +1,246 @@
+import argparse
+import copy
+import glob
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+USER_DB = "data/users.db"
+
+# Documents and accounts kept in memory per process (least recently used are dropped)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "4096"))
+
+# JSON files the store replaces (imported by migrate_json)
+USERS_FILE = "data/users.json"
+PROFILES_DIR = "data/profiles/"
+CALENDARS_DIR = "data/calendar_profiles/"
+
+# Kinds of per-user documents, each stored in its own table
+PROFILE = "profile"
+CALENDAR = "calendar"
+KINDS = (PROFILE, CALENDAR)
+ACCOUNT = "account"
+
+USER_SCHEMA = "".join(f"""
+CREATE TABLE IF NOT EXISTS {kind} (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT NOT NULL
+) WITHOUT ROWID;
+""" for kind in KINDS) + """
+CREATE TABLE IF NOT EXISTS account (
+    username TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+class UserStore:
+    """Accounts and per-user profiles and calendars in one SQLite database (WAL mode) shared by all workers.
+
+    Each user has one row per kind holding the document as JSON and a version that is
+    bumped on every write. Reads are served from a bounded in-process LRU cache, which is dropped
+    whenever another connection (e.g. another worker) has committed to the database.
+    Read-modify-write goes through update(), which runs in a single write transaction.
+    """
+
+    def __init__(self, path: str = USER_DB, cache_size: int = USER_CACHE_SIZE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # check_same_thread=False is safe: every use of the connection holds the lock
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(USER_SCHEMA)
+        self.lock = threading.RLock()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._data_version = None
+
+    def _check_cache(self):
+        # data_version changes when any other connection commits, our own writes update the cache directly
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._cache.clear()
+            self._data_version = data_version
+
+    def _remember(self, key: Tuple[str, str], value: Tuple[int, Dict[str, Any]]):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _read(self, kind: str, user_id: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        key = (kind, user_id)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        row = self.conn.execute(f"SELECT version, data FROM {kind} WHERE user_id = ?", (user_id,)).fetchone()
+        if not row:
+            # Misses aren't cached, so lookups of unknown users can't fill the cache
+            return 0, None
+        value = (row[0], json.loads(row[1]))
+        self._remember(key, value)
+        return value
+
+    def get(self, kind: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """A user's document (None if there is none)."""
+        with self.lock:
+            self._check_cache()
+            _, data = self._read(kind, user_id)
+        return copy.deepcopy(data)
+
+    def version(self, kind: str, user_id: str) -> int:
+        """Version of a user's document (0 if there is none), bumped on every write."""
+        with self.lock:
+            self._check_cache()
+            return self._read(kind, user_id)[0]
+
+    def update(self, kind: str, user_id: str, fn: Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]) -> Any:
+        """Atomically read, modify and write a user's document.
+
+        `fn` gets a copy of the current document (None if there is none) and returns the new
+        document, or None to leave it unchanged. It runs inside the write transaction, so no
+        other writer (thread or worker) can interleave. If it raises, nothing is written.
+
+        Returns:
+            The document returned by `fn`
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Holding the write lock, so re-check for commits from other workers before reading
+                self._check_cache()
+                version, data = self._read(kind, user_id)
+                new_data = fn(copy.deepcopy(data))
+                if new_data is not None:
+                    self.conn.execute(
+                        f"""
+                        INSERT INTO {kind} (user_id, data, version, updated_at) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (user_id) DO UPDATE
+                        SET data = excluded.data, version = excluded.version, updated_at = excluded.updated_at
+                        """,
+                        (user_id, json.dumps(new_data), version + 1, datetime.now().isoformat())
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                self._cache.pop((kind, user_id), None)
+                raise
+            if new_data is not None:
+                self._remember((kind, user_id), (version + 1, copy.deepcopy(new_data)))
+        return new_data
+
+    def put(self, kind: str, user_id: str, data: Dict[str, Any]):
+        """Replace a user's document."""
+        self.update(kind, user_id, lambda _: data)
+
+    def all(self, kind: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Every user's document, ordered by user (read straight from the database, bypassing the cache)."""
+        with self.lock:
+            rows = self.conn.execute(f"SELECT user_id, data FROM {kind} ORDER BY user_id").fetchall()
+        for user_id, data in rows:
+            yield user_id, json.loads(data)
+
+    def get_account(self, username: str) -> Optional[Dict[str, Any]]:
+        """A user's account ({"username", "password_hash", "created_at"}), None if there is none."""
+        with self.lock:
+            self._check_cache()
+            key = (ACCOUNT, username)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                account = self._cache[key][1]
+            else:
+                row = self.conn.execute(
+                    "SELECT username, password_hash, created_at FROM account WHERE username = ?", (username,)
+                ).fetchone()
+                if not row:
+                    return None
+                account = dict(zip(("username", "password_hash", "created_at"), row))
+                self._remember(key, (0, account))
+        return dict(account)
+
+    def create_account(self, username: str, password_hash: str) -> bool:
+        """Create an account, atomically: False (and nothing changes) if the username is taken."""
+        with self.lock:
+            created = self.conn.execute(
+                "INSERT INTO account (username, password_hash, created_at) VALUES (?, ?, ?) ON CONFLICT DO NOTHING",
+                (username, password_hash, datetime.now().isoformat())
+            ).rowcount == 1
+            self._cache.pop((ACCOUNT, username), None)
+        return created
+
+    def set_password_hash(self, username: str, password_hash: str):
+        with self.lock:
+            self.conn.execute("UPDATE account SET password_hash = ? WHERE username = ?", (password_hash, username))
+            self._cache.pop((ACCOUNT, username), None)
+
+    def migrate_json(self, profiles_dir: str = PROFILES_DIR, calendars_dir: str = CALENDARS_DIR,
+                     overwrite: bool = False, users_file: str = USERS_FILE) -> Dict[str, int]:
+        """Import users.json and the JSON profile and calendar files (<dir>/<user>.json) into the store.
+
+        Users that already have a row are skipped unless `overwrite` is set, so it is safe to run again.
+        Password hashes are imported as they are (they are upgraded on the next login, see auth.py).
+
+        Returns:
+            Number of accounts and documents imported per kind
+        """
+        imported = {ACCOUNT: 0}
+        if os.path.exists(users_file):
+            with open(users_file, "r") as f:
+                users = json.load(f)["users"]
+            for username, user in users.items():
+                created = self.create_account(username, user["password"])
+                if not created and overwrite:
+                    self.set_password_hash(username, user["password"])
+                imported[ACCOUNT] += created or overwrite
+        for kind, directory in ((PROFILE, profiles_dir), (CALENDAR, calendars_dir)):
+            imported[kind] = 0
+            for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+                user_id = os.path.splitext(os.path.basename(path))[0]
+                with open(path, "r") as f:
+                    data = json.load(f)
+
+                def replace(current, data=data):
+                    return data if current is None or overwrite else None
+
+                if self.update(kind, user_id, replace) is not None:
+                    imported[kind] += 1
+        return imported
+
+_store = None
+_store_lock = threading.Lock()
+
+def user_store() -> UserStore:
+    """The process-wide store (opened on first use; the JSON files are imported the first time)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = UserStore(USER_DB)
+                # user_version marks that the JSON files were imported (once, so deleted users don't come back)
+                if store.conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+                    imported = store.migrate_json()
+                    store.conn.execute("PRAGMA user_version = 1")
+                    print(f"Imported JSON files into {USER_DB}: {imported}")
+                _store = store
+    return _store
+
+if __name__ == "__main__":
+    # One-shot migration from the JSON files: python -m tools.user_store --migrate
+    parser = argparse.ArgumentParser(description="Account, profile and calendar store.")
+    parser.add_argument("--db", default=USER_DB)
+    parser.add_argument("--migrate", action="store_true", help="Import data/users.json, data/profiles and data/calendar_profiles")
+    parser.add_argument("--overwrite", action="store_true", help="Replace users that are already in the store")
+    args = parser.parse_args()
+
+    if args.migrate:
+        imported = UserStore(args.db).migrate_json(overwrite=args.overwrite)
+        print(f"Imported {imported[ACCOUNT]} accounts, {imported[PROFILE]} profiles and {imported[CALENDAR]} calendars into {args.db}.")
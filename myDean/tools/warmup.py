@@ -0,0 +1,71 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Every lazily built backend, by name (used for warm-up and the /healthz report)
+RESOURCES: Dict[str, "LazyResource"] = {}
+
+class LazyResource:
+    """A tool backend (index, vector store, client) built on first use.
+
+    Building is thread-safe: concurrent callers wait for a single build. warm_up() can
+    build every registered resource ahead of time in the background.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._value = None
+        self._lock = threading.Lock()
+        RESOURCES[name] = self
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def get(self) -> Any:
+        if self.ready:
+            return self._value
+        with self._lock:
+            if not self.ready:
+                self.status = "loading"
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    # Left retryable: the next get() tries again
+                    self.status = "error"
+                    self.error = str(e)
+                    raise
+                self.load_seconds = round(time.perf_counter() - start, 3)
+                self.error = None
+                self.status = "ready"
+                print(f"Loaded {self.name} in {self.load_seconds}s")
+        return self._value
+
+def _try_get(resource: LazyResource):
+    try:
+        resource.get()
+    except Exception as e:
+        print(f"Failed to load {resource.name}: {e}")
+
+def warm_up(max_workers: int = 4):
+    """Build every registered resource that isn't ready yet, concurrently (blocking)."""
+    pending = [r for r in RESOURCES.values() if not r.ready]
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup") as pool:
+        pool.map(_try_get, pending)
+
+def readiness() -> Dict[str, Dict[str, Any]]:
+    """Status of every registered resource."""
+    return {
+        name: {
+            "status": resource.status,
+            "load_seconds": resource.load_seconds,
+            "error": resource.error
+        }
+        for name, resource in RESOURCES.items()
+    }